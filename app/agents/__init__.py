@@ -1,6 +1,7 @@
 # app/agents/__init__.py
 
 from .auto_decider import decide_signal as decide_signal
+from .auto_decider import decide_signals as decide_signals
 
 # Explicit re-export for linting tools and clarity
-__all__ = ["decide_signal"]
+__all__ = ["decide_signal", "decide_signals"]
@@ -3,6 +3,8 @@ from __future__ import annotations
 
 import logging
 import os
+from collections.abc import Callable, Iterable
+from functools import lru_cache
 from typing import Any
 
 import MetaTrader5 as mt5  # type: ignore[import]
@@ -68,6 +70,24 @@ else:
 
 # Indices remain stable (no v2 yet)
 
+# Feature extractor per asset class (EQUITY has none -> no_trade)
+_FEATURES: dict[str, Callable[..., dict[str, Any]]] = {
+    "FX": fx_momentum_features,
+    "INDEX": indices_momentum_features,
+    "XAU": xau_momentum_features,
+}
+
+# Batch feature extractors (stable strategies only; v2 variants run per symbol)
+_BATCH_FEATURES: dict[str, Callable[..., dict[str, dict[str, Any]]]] = {}
+if not USE_EXPERIMENTAL_FX:
+    from app.strategies.fx_momentum import fx_momentum_features_batch
+
+    _BATCH_FEATURES["FX"] = fx_momentum_features_batch
+if not USE_EXPERIMENTAL_XAU:
+    from app.strategies.xau_momentum import xau_momentum_features_batch
+
+    _BATCH_FEATURES["XAU"] = xau_momentum_features_batch
+
 
 # -----------------------------
 # Regime Classification (Dynamic)
@@ -214,24 +234,173 @@ def compute_sl_tp(
 # -----------------------------
 # Asset Classification
 # -----------------------------
-def _classify_asset(symbol: str, env: dict[str, Any] | None) -> str:
-    """Lightweight asset-class classification."""
-    s = symbol.upper()
-    if env:
-        cls = env.get("ASSET_CLASS", "")
-        if isinstance(cls, str):
-            cls = cls.upper().strip()
-            if cls in {"FX", "XAU", "INDEX", "INDICES"}:
-                return "INDEX" if cls == "INDICES" else cls
+_ASSET_CLASS_ALIASES = {"FX": "FX", "XAU": "XAU", "INDEX": "INDEX", "INDICES": "INDEX"}
+_INDEX_SYMBOLS = frozenset({"US30", "NAS100", "GER40", "SPX500"})
+_FX_SUFFIXES = ("USD", "JPY", "EUR", "GBP", "AUD", "NZD", "CHF", "CAD")
+
+
+@lru_cache(maxsize=256)
+def _classify_symbol(s: str) -> str:
+    """Classification from the upper-cased symbol alone (memoized per symbol)."""
     if "XAU" in s or "GOLD" in s:
         return "XAU"
-    if s in {"US30", "NAS100", "GER40", "SPX500"} or s.endswith(".S"):
+    if s in _INDEX_SYMBOLS or s.endswith(".S"):
         return "INDEX"
-    if s.endswith(("USD", "JPY", "EUR", "GBP", "AUD", "NZD", "CHF", "CAD")) or "-ECNC" in s:
+    if s.endswith(_FX_SUFFIXES) or "-ECNC" in s:
         return "FX"
     return "EQUITY"
 
 
+def _classify_asset(symbol: str, env: dict[str, Any] | None) -> str:
+    """Lightweight asset-class classification (env ASSET_CLASS overrides the symbol)."""
+    if env:
+        cls = env.get("ASSET_CLASS", "")
+        if isinstance(cls, str):
+            alias = _ASSET_CLASS_ALIASES.get(cls.upper().strip())
+            if alias is not None:
+                return alias
+    return _classify_symbol(symbol.upper())
+
+
+# -----------------------------
+# Decision from raw features
+# -----------------------------
+def _decide_from_raw(
+    symbol: str, raw: dict[str, Any] | None, env: dict[str, Any] | None
+) -> dict[str, Any]:
+    """Classify regime from strategy features and build the normalized decision dict."""
+    if raw is None or not raw.get("accepted", False):
+        return {
+            "accepted": True,
+            "preview": {
+                "side": "",
+                "note": "no_trade",
+                "why": ["no features"],
+                "confidence": 0.0,
+                "volume_factor": 0.0,
+                "debug": {},
+            },
+        }
+
+    ema_fast = raw["ema_fast"]
+    ema_slow = raw["ema_slow"]
+    rsi = raw["rsi"]
+    sl_pips = raw["params"]["sl_pips"]
+    tp_pips = raw["params"]["tp_pips"]
+    rsi_long_th = raw["params"]["rsi_long_th"]
+    rsi_short_th = raw["params"]["rsi_short_th"]
+    features = raw["features"]
+
+    # --- Regime Classification (dynamic RSI thresholds) ---
+    regime, pos_factor, conf = classify_regime(ema_fast, ema_slow, rsi, rsi_long_th, rsi_short_th)
+
+    logger.info(
+        "[DECIDE] %s regime=%s ema_fast=%.5f ema_slow=%.5f rsi=%.2f (th_long=%.1f th_short=%.1f)",
+        symbol,
+        regime,
+        ema_fast,
+        ema_slow,
+        rsi,
+        rsi_long_th,
+        rsi_short_th,
+    )
+
+    preview: dict[str, Any] = {
+        "side": "",
+        "note": "no_trade",
+        "sl_pips": sl_pips,
+        "tp_pips": tp_pips,
+        "why": ["neutral or guardrails not met"],
+        "volume_factor": pos_factor,
+        "confidence": conf,
+        "debug": raw,
+    }
+
+    # --- Aligned Bull / Bear ---
+    if regime in ("ALIGNED_BULL", "ALIGNED_BEAR"):
+        side = "LONG" if regime == "ALIGNED_BULL" else "SHORT"
+        sl_adj, tp_adj = adjust_risk(regime, sl_pips, tp_pips)
+        preview.update(
+            {
+                "side": side,
+                "note": regime,
+                "sl_pips": sl_adj,
+                "tp_pips": tp_adj,
+                "why": [regime],
+                "volume_factor": pos_factor,
+                "confidence": conf,
+            }
+        )
+        # 💡 Diagnostic signal logging
+        logger.info("[SIGNAL] %s detected %s regime -> %s trade", symbol, regime, side)
+
+    # --- Mixed Up ---
+    elif regime == "MIXED_UP":
+        sig = validate_mixed_up(features)
+        if not sig:
+            sig = mixed_fallback_decision(
+                regime,
+                ema_fast,
+                ema_slow,
+                rsi,
+                rsi_long_th,
+                rsi_short_th,
+                raw["eps"],
+                env or {},
+            )
+        if sig:
+            sl_adj, tp_adj = adjust_risk(regime, sl_pips, tp_pips)
+            preview.update(
+                {
+                    "side": sig["side"],
+                    "note": sig["note"],
+                    "sl_pips": sl_adj,
+                    "tp_pips": tp_adj,
+                    "why": [regime, sig["note"]],
+                    "volume_factor": min(0.33, pos_factor),
+                    "confidence": min(0.6, conf),
+                }
+            )
+
+    # --- Mixed Down ---
+    elif regime == "MIXED_DOWN":
+        sig = validate_mixed_down(features)
+        if not sig:
+            sig = mixed_fallback_decision(
+                regime,
+                ema_fast,
+                ema_slow,
+                rsi,
+                rsi_long_th,
+                rsi_short_th,
+                raw["eps"],
+                env or {},
+            )
+        if sig:
+            sl_adj, tp_adj = adjust_risk(regime, sl_pips, tp_pips)
+            preview.update(
+                {
+                    "side": sig["side"],
+                    "note": sig["note"],
+                    "sl_pips": sl_adj,
+                    "tp_pips": tp_adj,
+                    "why": [regime, sig["note"]],
+                    "volume_factor": min(0.33, pos_factor),
+                    "confidence": min(0.6, conf),
+                }
+            )
+
+    return {"accepted": True, "preview": preview}
+
+
+def _no_market_data() -> dict[str, Any]:
+    return {
+        "accepted": False,
+        "note": "no market data",
+        "why": ["data frame empty or unavailable"],
+    }
+
+
 # -----------------------------
 # Main Decision
 # -----------------------------
@@ -248,147 +417,68 @@ def decide_signal(
 
         df = get_rates_df(symbol, timeframe, 300)
         if df is None or df.empty:
-            return {
-                "accepted": False,
-                "note": "no market data",
-                "why": ["data frame empty or unavailable"],
-            }
+            return _no_market_data()
 
         # Fetch raw features
-        if cls == "FX":
-            raw = fx_momentum_features(symbol, timeframe, env or {})
-        elif cls == "INDEX":
-            raw = indices_momentum_features(symbol, timeframe, env or {})
-        elif cls == "XAU":
-            raw = xau_momentum_features(symbol, timeframe, env or {})
-        else:
-            raw = None
-
-        if raw is None or not raw.get("accepted", False):
-            return {
-                "accepted": True,
-                "preview": {
-                    "side": "",
-                    "note": "no_trade",
-                    "why": ["no features"],
-                    "confidence": 0.0,
-                    "volume_factor": 0.0,
-                    "debug": {},
-                },
-            }
+        features_fn = _FEATURES.get(cls)
+        raw = features_fn(symbol, timeframe, env or {}) if features_fn is not None else None
 
-        ema_fast = raw["ema_fast"]
-        ema_slow = raw["ema_slow"]
-        rsi = raw["rsi"]
-        sl_pips = raw["params"]["sl_pips"]
-        tp_pips = raw["params"]["tp_pips"]
-        rsi_long_th = raw["params"]["rsi_long_th"]
-        rsi_short_th = raw["params"]["rsi_short_th"]
-        features = raw["features"]
-
-        # --- Regime Classification (dynamic RSI thresholds) ---
-        regime, pos_factor, conf = classify_regime(
-            ema_fast, ema_slow, rsi, rsi_long_th, rsi_short_th
-        )
+        return _decide_from_raw(symbol, raw, env)
 
-        logger.info(
-            "[DECIDE] %s regime=%s ema_fast=%.5f ema_slow=%.5f rsi=%.2f (th_long=%.1f th_short=%.1f)",
-            symbol,
-            regime,
-            ema_fast,
-            ema_slow,
-            rsi,
-            rsi_long_th,
-            rsi_short_th,
-        )
+    except Exception as e:
+        logger.exception("Error in decide_signal for %s", symbol)
+        return {"accepted": False, "error": "strategy_error", "why": [f"{type(e).__name__}: {e}"]}
 
-        preview: dict[str, Any] = {
-            "side": "",
-            "note": "no_trade",
-            "sl_pips": sl_pips,
-            "tp_pips": tp_pips,
-            "why": ["neutral or guardrails not met"],
-            "volume_factor": pos_factor,
-            "confidence": conf,
-            "debug": raw,
-        }
 
-        # --- Aligned Bull / Bear ---
-        if regime in ("ALIGNED_BULL", "ALIGNED_BEAR"):
-            side = "LONG" if regime == "ALIGNED_BULL" else "SHORT"
-            sl_adj, tp_adj = adjust_risk(regime, sl_pips, tp_pips)
-            preview.update(
-                {
-                    "side": side,
-                    "note": regime,
-                    "sl_pips": sl_adj,
-                    "tp_pips": tp_adj,
-                    "why": [regime],
-                    "volume_factor": pos_factor,
-                    "confidence": conf,
+# -----------------------------
+# Batch Decision
+# -----------------------------
+def decide_signals(
+    symbols: Iterable[str],
+    timeframe: str = "H1",
+    agent: str | None = None,
+    env: dict[str, Any] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """
+    Batch variant of decide_signal for a portfolio of symbols.
+    Symbols are grouped by asset class; groups with a batch feature extractor share one
+    vectorized EMA/RSI pass, the rest fall back to per-symbol decide_signal.
+    Returns {symbol: decision dict} in the same shape as decide_signal.
+    """
+    groups: dict[str, list[str]] = {}
+    for symbol in symbols:
+        groups.setdefault(_classify_asset(symbol, env), []).append(symbol)
+
+    out: dict[str, dict[str, Any]] = {}
+    for cls, members in groups.items():
+        batch = _BATCH_FEATURES.get(cls)
+        if batch is None:
+            for symbol in members:
+                out[symbol] = decide_signal(symbol, timeframe, agent, env)
+            continue
+
+        try:
+            raws = batch(members, timeframe, env or {})
+        except Exception:
+            logger.exception("Batch features failed for %s; falling back per symbol", cls)
+            for symbol in members:
+                out[symbol] = decide_signal(symbol, timeframe, agent, env)
+            continue
+
+        for symbol in members:
+            raw = raws.get(symbol)
+            # the batch extractor reports missing bars itself; answer like decide_signal's gate
+            if raw is not None and raw.get("note") == "no_data" and not raw.get("accepted"):
+                out[symbol] = _no_market_data()
+                continue
+            try:
+                out[symbol] = _decide_from_raw(symbol, raw, env)
+            except Exception as e:
+                logger.exception("Error in decide_signals for %s", symbol)
+                out[symbol] = {
+                    "accepted": False,
+                    "error": "strategy_error",
+                    "why": [f"{type(e).__name__}: {e}"],
                 }
-            )
-            # 💡 Diagnostic signal logging
-            logger.info("[SIGNAL] %s detected %s regime -> %s trade", symbol, regime, side)
-
-        # --- Mixed Up ---
-        elif regime == "MIXED_UP":
-            sig = validate_mixed_up(features)
-            if not sig:
-                sig = mixed_fallback_decision(
-                    regime,
-                    ema_fast,
-                    ema_slow,
-                    rsi,
-                    rsi_long_th,
-                    rsi_short_th,
-                    raw["eps"],
-                    env or {},
-                )
-            if sig:
-                sl_adj, tp_adj = adjust_risk(regime, sl_pips, tp_pips)
-                preview.update(
-                    {
-                        "side": sig["side"],
-                        "note": sig["note"],
-                        "sl_pips": sl_adj,
-                        "tp_pips": tp_adj,
-                        "why": [regime, sig["note"]],
-                        "volume_factor": min(0.33, pos_factor),
-                        "confidence": min(0.6, conf),
-                    }
-                )
-
-        # --- Mixed Down ---
-        elif regime == "MIXED_DOWN":
-            sig = validate_mixed_down(features)
-            if not sig:
-                sig = mixed_fallback_decision(
-                    regime,
-                    ema_fast,
-                    ema_slow,
-                    rsi,
-                    rsi_long_th,
-                    rsi_short_th,
-                    raw["eps"],
-                    env or {},
-                )
-            if sig:
-                sl_adj, tp_adj = adjust_risk(regime, sl_pips, tp_pips)
-                preview.update(
-                    {
-                        "side": sig["side"],
-                        "note": sig["note"],
-                        "sl_pips": sl_adj,
-                        "tp_pips": tp_adj,
-                        "why": [regime, sig["note"]],
-                        "volume_factor": min(0.33, pos_factor),
-                        "confidence": min(0.6, conf),
-                    }
-                )
-
-        return {"accepted": True, "preview": preview}
 
-    except Exception as e:
-        logger.exception("Error in decide_signal for %s", symbol)
-        return {"accepted": False, "error": "strategy_error", "why": [f"{type(e).__name__}: {e}"]}
+    return out
@@ -5,11 +5,14 @@ import contextlib
 import datetime as dt
 import os
 import re
+import time
+from collections import OrderedDict
 from typing import Any
 
 import MetaTrader5 as _mt5  # type: ignore
 import numpy as np
 import pandas as pd
+from app.util.mt5_bars import MAX_CACHED_FRAMES, _bucket_seconds
 
 try:
     from app.brokers import mt5_client as mt5c
@@ -161,6 +164,36 @@ def get_rates(symbol: str, tf: str = "M15", n: int = 300) -> pd.DataFrame:
     return df
 
 
+# (symbol, tf, n) -> (time bucket, frame); one slot per key, so an expired bucket is
+# replaced rather than kept alive next to the fresh one. Buckets come from
+# mt5_bars._bucket_seconds, so MT5_BARS_TTL_SEC drives both coalescers.
+_RATES_CACHE: OrderedDict[tuple[str, str, int], tuple[int, pd.DataFrame]] = OrderedDict()
+
+
+def get_rates_cached(symbol: str, tf: str = "M15", n: int = 300) -> pd.DataFrame:
+    """
+    Coalesced `get_rates`: one MT5 fetch per time bucket, sized like
+    `get_bars_cached` (MT5_BARS_TTL_SEC, at most half a bar). Treat the frame as
+    read-only. Empty (failed) fetches are not cached.
+    """
+    key = (symbol, tf, n)
+    bucket = int(time.time()) // _bucket_seconds(tf)
+    hit = _RATES_CACHE.get(key)
+    if hit is not None and hit[0] == bucket:
+        _RATES_CACHE.move_to_end(key)
+        return hit[1]
+
+    df = get_rates(symbol, tf, n)
+    if df.empty:
+        _RATES_CACHE.pop(key, None)
+        return df
+    _RATES_CACHE[key] = (bucket, df)
+    _RATES_CACHE.move_to_end(key)
+    while len(_RATES_CACHE) > MAX_CACHED_FRAMES:
+        _RATES_CACHE.popitem(last=False)
+    return df
+
+
 def get_rates_payload(symbol: str, tf: str = "M15", n: int = 300) -> tuple[bool, dict[str, Any]]:
     """Tuple-returning variant: (ok, payload)."""
     _ensure_initialized()
@@ -1,11 +1,14 @@
 # app/risk/guards.py
 from __future__ import annotations
 
-import datetime as dt
 import os
+import time
 from typing import Any, cast
 
 import MetaTrader5 as _mt5
+import numpy as np
+
+from app.util.envparse import parse_float, parse_int
 
 # Treat MT5 as dynamic for type-checking (silences Pylance attr warnings)
 mt5: Any = cast(Any, _mt5)
@@ -19,35 +22,59 @@ def _env_bool(name: str, default: bool) -> bool:
     return raw in _TRUE
 
 
+# parsing is memoized on the raw env string, so edits still apply on the next call
 def _env_int(name: str, default: int) -> int:
-    try:
-        return int(float((os.getenv(name) or str(default)).split("#", 1)[0].strip()))
-    except Exception:
+    raw = os.getenv(name)
+    if not raw:  # unset or empty: no formatting/parsing round-trip of the default
         return default
+    return parse_int(raw, default)
 
 
 def _env_float(name: str, default: float) -> float:
-    try:
-        return float((os.getenv(name) or str(default)).split("#", 1)[0].strip())
-    except Exception:
+    raw = os.getenv(name)
+    if not raw:
         return default
+    return parse_float(raw, default)
 
 
 def _normalize_key(s: str) -> str:
     return "".join(ch if ch.isalnum() else "_" for ch in (s or "").upper())
 
 
-def _now_utc() -> dt.datetime:
-    return dt.datetime.now(dt.UTC)
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
 
 
 # ---------------- Data access helpers ----------------
-def _positions(symbol: str | None = None) -> list[Any]:
-    return list(mt5.positions_get(symbol=symbol)) if symbol else list(mt5.positions_get())
-
-
-def _account_equity() -> float:
-    acc = mt5.account_info()
+# One check reads a single positions/account snapshot; the per-symbol view is a
+# mask over it instead of another terminal round-trip.
+def _positions() -> list[Any]:
+    return list(mt5.positions_get() or ())
+
+
+def broker_snapshot() -> tuple[list[Any], Any]:
+    """(all open positions, account info) for callers checking several symbols per tick."""
+    return _positions(), mt5.account_info()
+
+
+def _positions_to_soa(positions: list[Any]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pack positions into parallel arrays in one pass: (is_buy bool, profit float64,
+    symbol object). Per-symbol and per-side views are then boolean masks.
+    """
+    n = len(positions)
+    is_buy = np.empty(n, dtype=bool)
+    profits = np.empty(n, dtype=np.float64)
+    symbols = np.empty(n, dtype=object)
+    buy_code = getattr(mt5, "POSITION_TYPE_BUY", 0)
+    for i, p in enumerate(positions):
+        is_buy[i] = int(getattr(p, "type", 0)) == buy_code
+        profits[i] = float(getattr(p, "profit", 0.0))
+        symbols[i] = getattr(p, "symbol", None)
+    return is_buy, profits, symbols
+
+
+def _account_equity(acc: Any) -> float:
     if not acc:
         return 0.0
     eq = float(getattr(acc, "equity", 0.0))
@@ -56,22 +83,13 @@ def _account_equity() -> float:
     return float(getattr(acc, "balance", 0.0))
 
 
-def _daily_pnl() -> float:
-    acc = mt5.account_info()
+def _daily_pnl(acc: Any, profits: np.ndarray) -> float:
     realized = float(getattr(acc, "profit", 0.0)) if acc else 0.0
+    return realized + float(profits.sum())
 
-    flt = 0.0
-    for p in _positions():
-        flt += float(getattr(p, "profit", 0.0))
 
-    return realized + flt
-
-
-def _floating_symbol_pnl(symbol: str) -> float:
-    total = 0.0
-    for p in _positions(symbol):
-        total += float(getattr(p, "profit", 0.0))
-    return total
+def _floating_symbol_pnl(profits: np.ndarray, mask_sym: np.ndarray) -> float:
+    return float(profits[mask_sym].sum())
 
 
 def _market_is_open(symbol: str) -> bool:
@@ -88,20 +106,20 @@ def _market_is_open(symbol: str) -> bool:
     last = getattr(tick, "time_msc", None) or getattr(tick, "time", None)
     if not last:
         return True
+    # tick times are epoch ms or s; compare the age in integer ms
     try:
-        ts = float(last) / (1000.0 if last > 10**12 else 1.0)
-        age = _now_utc() - dt.datetime.fromtimestamp(ts, tz=dt.UTC)
-        return age <= dt.timedelta(minutes=5)
-    except Exception:
+        last_ms = int(last) if last > 10**12 else int(last) * 1000
+    except (TypeError, ValueError):
         return True
+    return _now_ms() - last_ms <= 5 * 60_000
 
 
 # ---------------- Cooldown bookkeeping ----------------
-_last_trade_at: dict[str, dt.datetime] = {}
+_last_trade_at: dict[str, int] = {}  # normalized symbol -> epoch ms
 
 
 def note_trade(symbol: str) -> None:
-    _last_trade_at[_normalize_key(symbol)] = _now_utc()
+    _last_trade_at[_normalize_key(symbol)] = _now_ms()
 
 
 def _cooldown_remaining(symbol: str, cooldown_min: int) -> float:
@@ -111,57 +129,55 @@ def _cooldown_remaining(symbol: str, cooldown_min: int) -> float:
     last = _last_trade_at.get(key)
     if not last:
         return 0.0
-    passed = (_now_utc() - last).total_seconds() / 60.0
+    passed = (_now_ms() - last) / 60_000.0
     remain = float(cooldown_min) - passed
     return remain if remain > 0.0 else 0.0
 
 
 # ---------------- Guard checks ----------------
-def _cap_current_open() -> tuple[int, int]:
+def _cap_current_open(n_open: int) -> tuple[int, int]:
     max_all = _env_int("MAX_OPEN_POSITIONS", _env_int("AGENT_MAX_OPEN", 0))
-    cur_all = len(_positions())
-    return cur_all, max_all
+    return n_open, max_all
 
 
-def _cap_symbol_open(symbol: str) -> tuple[int, int]:
+def _cap_symbol_open(mask_sym: np.ndarray) -> tuple[int, int]:
     max_sym = _env_int("MAX_TRADES_PER_SYMBOL", _env_int("AGENT_MAX_PER_SYMBOL", 0))
-    cur_sym = len(_positions(symbol))
-    return cur_sym, max_sym
+    return int(mask_sym.sum()), max_sym
 
 
-def _same_side_block(symbol: str, side: str) -> bool:
+def _same_side_block(side_open: int) -> bool:
     if not _env_bool("AGENT_BLOCK_SAME_SIDE", False):
         return False
-    want_buy = (side or "").upper() == "LONG"
-    for p in _positions(symbol):
-        is_buy = int(getattr(p, "type", 0)) == getattr(mt5, "POSITION_TYPE_BUY", 0)
-        if is_buy == want_buy:
-            return True
-    return False
+    return side_open > 0
 
 
-def _exposure_side_count(symbol: str, side: str) -> int:
+def _exposure_side_count(is_buy: np.ndarray, mask_sym: np.ndarray, side: str) -> int:
     want_buy = (side or "").upper() == "LONG"
-    n = 0
-    for p in _positions(symbol):
-        is_buy = int(getattr(p, "type", 0)) == getattr(mt5, "POSITION_TYPE_BUY", 0)
-        if is_buy == want_buy:
-            n += 1
-    return n
+    return int((mask_sym & (is_buy == want_buy)).sum())
 
 
-def _exposure_side_cap(symbol: str, side: str) -> tuple[int, int]:
-    key = f"MAX_PER_SIDE_{_normalize_key(symbol)}"
-    sym_cap = _env_int(key, 0)
+def _exposure_side_cap(symbol: str) -> int:
+    sym_cap = _env_int(f"MAX_PER_SIDE_{_normalize_key(symbol)}", 0)
     if sym_cap > 0:
-        return _exposure_side_count(symbol, side), sym_cap
-    return _exposure_side_count(symbol, side), _env_int("AGENT_MAX_PER_SIDE", 0)
+        return sym_cap
+    return _env_int("AGENT_MAX_PER_SIDE", 0)
 
 
 # ---------------- Public API ----------------
-def check_pretrade_guards(symbol: str, side: str) -> dict[str, Any]:
+def check_pretrade_guards(
+    symbol: str,
+    side: str,
+    *,
+    positions: list[Any] | None = None,
+    account: Any = None,
+) -> dict[str, Any]:
+    # `positions` / `account` (see `broker_snapshot`) let a caller share one terminal
+    # snapshot across symbols; when omitted they are fetched here
     reasons: list[str] = []
     caps: dict[str, Any] = {}
+    is_buy, profits, symbols = _positions_to_soa(_positions() if positions is None else positions)
+    mask_sym = symbols == symbol
+    acc = mt5.account_info() if account is None else account
 
     if _env_bool("AGENT_MARKET_CHECK", True) and not _market_is_open(symbol):
         reasons.append("market_closed_or_stale")
@@ -173,8 +189,8 @@ def check_pretrade_guards(symbol: str, side: str) -> dict[str, Any]:
     if cd_left > 0.0:
         reasons.append("cooldown_active")
 
-    cur_all, max_all = _cap_current_open()
-    cur_sym, max_sym = _cap_symbol_open(symbol)
+    cur_all, max_all = _cap_current_open(len(profits))
+    cur_sym, max_sym = _cap_symbol_open(mask_sym)
     caps["open_all"] = cur_all
     caps["cap_all"] = max_all
     caps["open_symbol"] = cur_sym
@@ -185,16 +201,18 @@ def check_pretrade_guards(symbol: str, side: str) -> dict[str, Any]:
     if max_sym > 0 and cur_sym >= max_sym:
         reasons.append("per_symbol_cap_reached")
 
-    side_open, side_cap = _exposure_side_cap(symbol, side)
+    # one masked count serves both the per-side cap and the same-side block
+    side_open = _exposure_side_count(is_buy, mask_sym, side)
+    side_cap = _exposure_side_cap(symbol)
     caps["open_side"] = side_open
     caps["cap_side"] = side_cap
     if side_cap > 0 and side_open >= side_cap:
         reasons.append("per_side_cap_reached")
 
-    if _same_side_block(symbol, side):
+    if _same_side_block(side_open):
         reasons.append("same_side_blocked")
 
-    eq = _account_equity()
+    eq = _account_equity(acc)
     floor = _env_float("EQUITY_FLOOR", 0.0)
     caps["equity"] = round(eq, 2)
     caps["equity_floor"] = floor
@@ -202,14 +220,14 @@ def check_pretrade_guards(symbol: str, side: str) -> dict[str, Any]:
         reasons.append("equity_floor_breached")
 
     daily_loss_limit = _env_float("DAILY_LOSS_LIMIT", 0.0)
-    daily_pnl_val = _daily_pnl()
+    daily_pnl_val = _daily_pnl(acc, profits)
     caps["daily_pnl"] = round(daily_pnl_val, 2)
     caps["daily_loss_limit"] = daily_loss_limit
     if daily_loss_limit > 0.0 and daily_pnl_val <= -abs(daily_loss_limit):
         reasons.append("daily_loss_limit_hit")
 
     min_symbol_flt = _env_float("MIN_SYMBOL_FLOATING_PNL", 0.0)
-    flt = _floating_symbol_pnl(symbol)
+    flt = _floating_symbol_pnl(profits, mask_sym)
     caps["symbol_floating_pnl"] = round(flt, 2)
     caps["symbol_floating_min"] = min_symbol_flt
     if min_symbol_flt < 0.0 and flt <= min_symbol_flt:
@@ -219,11 +237,23 @@ def check_pretrade_guards(symbol: str, side: str) -> dict[str, Any]:
     return {"ok": ok, "why": reasons, "caps": caps}
 
 
-# ---- Back-compat export (main.py expects risk_guard) ----
-risk_guard = check_pretrade_guards
+# ---- Back-compat export (main.py / run_auto_guarded expect risk_guard) ----
+def risk_guard(
+    symbol: str,
+    side: str,
+    sl_pips: float | None = None,
+    *,
+    positions: list[Any] | None = None,
+    account: Any = None,
+) -> dict[str, Any]:
+    """`check_pretrade_guards` plus the legacy 'accepted'/'note' keys; sl_pips is unused."""
+    g = check_pretrade_guards(symbol, side, positions=positions, account=account)
+    return {**g, "accepted": g["ok"], "note": ", ".join(g["why"]) or "ok"}
+
 
 # Optional: define _all_ so static analyzers know what's exported
 _all_ = [
+    "broker_snapshot",
     "check_pretrade_guards",
     "note_trade",
     "risk_guard",
@@ -0,0 +1,192 @@
+# app/strategies/_momentum_core.py
+"""
+Shared EMA/RSI momentum feature extraction for the stable FX and XAU strategies.
+
+The asset modules only differ in env key normalization and default SL/TP/eps,
+captured by a `MomentumSpec`; everything else (fetch, indicators, payload, batch
+path) lives here so the two cannot drift apart.
+"""
+
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from pandas import DataFrame
+
+from app.strategies._state import streaming_indicators
+from app.util.indicators import compute_ema_rsi_batch, compute_emas_rsi
+from app.util.mt5_bars import as_f64, get_bars_cached
+
+logger = logging.getLogger(__name__)
+
+STREAMING_ATR_PERIOD = 14  # tracked by the streaming state, unused by the payload
+
+
+@dataclass(frozen=True, slots=True)
+class MomentumSpec:
+    """Per-asset-class knobs of the shared momentum extractor."""
+
+    name: str  # public feature function name, used in log messages
+    key_replacements: tuple[tuple[str, str], ...]  # symbol -> env key suffix
+    eps: float
+    sl_pips: float
+    tp_pips: float
+    params_with_eps: bool  # whether the payload's "params" echoes eps
+
+
+def momentum_params(symbol: str, env: dict[str, Any] | None, spec: MomentumSpec) -> dict[str, Any]:
+    """Parameter overrides for `symbol` from env (keys use the normalized symbol)."""
+    key_base = symbol
+    for old, new in spec.key_replacements:
+        key_base = key_base.replace(old, new)
+    key_base = key_base.upper()
+    return {
+        "ema_fast": int(env.get(f"EMA_FAST_{key_base}", 20)) if env else 20,
+        "ema_slow": int(env.get(f"EMA_SLOW_{key_base}", 50)) if env else 50,
+        "rsi_period": int(env.get(f"RSI_PERIOD_{key_base}", 14)) if env else 14,
+        "rsi_long_th": float(env.get(f"RSI_LONG_TH_{key_base}", 60)) if env else 60,
+        "rsi_short_th": float(env.get(f"RSI_SHORT_TH_{key_base}", 40)) if env else 40,
+        "eps": float(env.get(f"EPS_{key_base}", spec.eps)) if env else spec.eps,
+        "sl_pips": float(env.get(f"SL_{key_base}", spec.sl_pips)) if env else spec.sl_pips,
+        "tp_pips": float(env.get(f"TP_{key_base}", spec.tp_pips)) if env else spec.tp_pips,
+    }
+
+
+def momentum_payload(
+    symbol: str,
+    params: dict[str, Any],
+    spec: MomentumSpec,
+    values: tuple[float, float, float, float],
+) -> dict[str, Any]:
+    """
+    Feature payload consumed by auto_decider (no decision here); `values` is
+    (price, ema_fast, ema_slow, rsi) as returned by `momentum_eval`.
+    """
+    price, ema_fast_val, ema_slow_val, rsi_val = values
+    return {
+        "accepted": True,
+        "symbol": symbol,
+        "price": price,
+        "ema_fast": ema_fast_val,
+        "ema_slow": ema_slow_val,
+        "rsi": rsi_val,
+        "eps": params["eps"],
+        "params": (
+            dict(params)
+            if spec.params_with_eps
+            else {k: v for k, v in params.items() if k != "eps"}
+        ),
+        "features": {
+            # placeholder flags for guardrails (computed separately)
+            "structure_break_up": False,
+            "pullback_holds_fastEMA_or_VWAP": False,
+            "bearish_divergence": False,
+            "level_rejection": False,
+            "structure_break_down": False,
+            "pullback_rejects_fastEMA_or_VWAP": False,
+            "bullish_divergence": False,
+            "support_hold": False,
+        },
+    }
+
+
+def momentum_eval(closes: np.ndarray, params: dict[str, Any]) -> tuple[float, float, float, float]:
+    """(price, ema_fast, ema_slow, rsi) at the last close, in one fused indicator pass."""
+    ema_fast_val, ema_slow_val, rsi_val, _, _ = compute_emas_rsi(
+        closes, params["ema_fast"], params["ema_slow"], params["rsi_period"]
+    )
+    return float(closes[-1]), ema_fast_val, ema_slow_val, rsi_val
+
+
+def _streaming(env: dict[str, Any] | None) -> bool:
+    """MOMENTUM_STREAMING=true: O(new bars) per-(symbol, timeframe) state instead of a full pass."""
+    return bool(env) and str(env.get("MOMENTUM_STREAMING", "false")).lower() == "true"
+
+
+def momentum_eval_streaming(
+    symbol: str, timeframe: str, df: DataFrame, closes: np.ndarray, params: dict[str, Any]
+) -> tuple[float, float, float, float]:
+    """
+    Same as `momentum_eval`, but the EMAs/RSI continue from the stored state rather than
+    being re-seeded over the fetched window, so values drift from the windowed pass.
+    """
+    ema_fast_val, ema_slow_val, rsi_val, _, _, _ = streaming_indicators(
+        symbol,
+        timeframe,
+        df,
+        closes,
+        highs=as_f64(df["high"]),
+        lows=as_f64(df["low"]),
+        ema_fast_p=params["ema_fast"],
+        ema_slow_p=params["ema_slow"],
+        rsi_p=params["rsi_period"],
+        atr_p=STREAMING_ATR_PERIOD,
+    )
+    return float(closes[-1]), ema_fast_val, ema_slow_val, rsi_val
+
+
+def momentum_features(
+    symbol: str, env: dict[str, Any] | None, spec: MomentumSpec
+) -> dict[str, Any]:
+    """Single-symbol feature extraction (bars timeframe comes from env TIMEFRAME)."""
+    try:
+        params = momentum_params(symbol, env, spec)
+
+        timeframe_val = env.get("TIMEFRAME", "M15") if env else "M15"
+        df = get_bars_cached(symbol, timeframe_val, params["ema_slow"] + 5)
+        if df is None or df.empty:
+            return {"accepted": False, "note": "no_data"}
+
+        closes = as_f64(df["close"])
+        if _streaming(env):
+            values = momentum_eval_streaming(symbol, timeframe_val, df, closes, params)
+        else:
+            values = momentum_eval(closes, params)
+        return momentum_payload(symbol, params, spec, values)
+
+    except Exception as e:
+        logger.exception("Error in %s", spec.name)
+        return {"accepted": False, "error": "strategy_error", "why": [str(e)]}
+
+
+def momentum_features_batch(
+    symbols: Iterable[str], env: dict[str, Any] | None, spec: MomentumSpec
+) -> dict[str, dict[str, Any]]:
+    """
+    Batch variant of `momentum_features`. Symbols sharing EMA/RSI periods and bar
+    count are stacked into one (N, T) close matrix and evaluated in a single pass.
+    With MOMENTUM_STREAMING each symbol advances its own state instead (no stacking).
+    """
+    out: dict[str, dict[str, Any]] = {}
+    groups: dict[tuple[int, int, int, int], list[tuple[str, dict[str, Any], np.ndarray]]] = {}
+    timeframe_val = env.get("TIMEFRAME", "M15") if env else "M15"
+    streaming = _streaming(env)
+
+    for symbol in symbols:
+        try:
+            params = momentum_params(symbol, env, spec)
+            df = get_bars_cached(symbol, timeframe_val, params["ema_slow"] + 5)
+            if df is None or df.empty:
+                out[symbol] = {"accepted": False, "note": "no_data"}
+                continue
+            closes = as_f64(df["close"])
+            if streaming:
+                values = momentum_eval_streaming(symbol, timeframe_val, df, closes, params)
+                out[symbol] = momentum_payload(symbol, params, spec, values)
+                continue
+            key = (params["ema_fast"], params["ema_slow"], params["rsi_period"], len(closes))
+            groups.setdefault(key, []).append((symbol, params, closes))
+        except Exception as e:
+            logger.exception("Error in %s_batch for %s", spec.name, symbol)
+            out[symbol] = {"accepted": False, "error": "strategy_error", "why": [str(e)]}
+
+    for (ema_fast, ema_slow, rsi_period, _), members in groups.items():
+        close_mat = np.vstack([closes for _, _, closes in members])
+        ema_f, ema_s, rsi_v = compute_ema_rsi_batch(close_mat, ema_fast, ema_slow, rsi_period)
+        for i, (symbol, params, closes) in enumerate(members):
+            values = (float(closes[-1]), float(ema_f[i]), float(ema_s[i]), float(rsi_v[i]))
+            out[symbol] = momentum_payload(symbol, params, spec, values)
+
+    return out
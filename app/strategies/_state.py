@@ -0,0 +1,201 @@
+# ============================================================
+# app/strategies/_state.py
+# Agentic Trader - Streaming EMA / RSI / ATR state per (symbol, timeframe)
+# ============================================================
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from pandas import DataFrame
+
+from app.util.indicators import EPSILON, compute_ema_series
+
+
+@dataclass(slots=True)
+class IndState:
+    """
+    Indicator recurrences committed up to the last *closed* bar.
+
+    The forming bar is never committed: `peek` folds it in on the fly, so repeated
+    ticks on the same bar cost O(1) and leave the state untouched. Seeding matches
+    `app.util.indicators` (SMA-seeded EMAs, mean-seeded Wilder RSI) over the warm-up
+    history, and ATR is the simple mean of the last `atr_p` true ranges.
+    """
+
+    ema_fast_p: int
+    ema_slow_p: int
+    rsi_p: int
+    atr_p: int
+    ef: float
+    es: float
+    ef_prev: float  # EMAs one closed bar earlier (for the 2-bar slope)
+    es_prev: float
+    ag: float
+    al: float
+    tr_buf: np.ndarray  # ring of the last atr_p true ranges
+    tr_idx: int  # next write position == oldest entry
+    last_close: float
+    last_time: int
+
+    @classmethod
+    def from_history(
+        cls,
+        closes: np.ndarray,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        last_time: int,
+        *,
+        ema_fast_p: int,
+        ema_slow_p: int,
+        rsi_p: int,
+        atr_p: int,
+    ) -> IndState:
+        """Warm the recurrences from closed bars (oldest first)."""
+        ema_f = compute_ema_series(closes, ema_fast_p)
+        ema_s = compute_ema_series(closes, ema_slow_p)
+
+        deltas = np.diff(closes)
+        ag = float(np.sum(deltas[:rsi_p], where=deltas[:rsi_p] > 0.0)) / rsi_p
+        al = -float(np.sum(deltas[:rsi_p], where=deltas[:rsi_p] <= 0.0)) / rsi_p
+        for d in deltas[rsi_p:]:
+            ag = (ag * (rsi_p - 1) + (d if d > 0.0 else 0.0)) / rsi_p
+            al = (al * (rsi_p - 1) + (-d if d < 0.0 else 0.0)) / rsi_p
+
+        tr = np.maximum.reduce(
+            [
+                highs[1:] - lows[1:],
+                np.abs(highs[1:] - closes[:-1]),
+                np.abs(lows[1:] - closes[:-1]),
+            ]
+        )
+
+        return cls(
+            ema_fast_p=ema_fast_p,
+            ema_slow_p=ema_slow_p,
+            rsi_p=rsi_p,
+            atr_p=atr_p,
+            ef=float(ema_f[-1]),
+            es=float(ema_s[-1]),
+            ef_prev=float(ema_f[-2]),
+            es_prev=float(ema_s[-2]),
+            ag=ag,
+            al=al,
+            tr_buf=np.array(tr[-atr_p:], dtype=np.float64),
+            tr_idx=0,
+            last_close=float(closes[-1]),
+            last_time=last_time,
+        )
+
+    def _true_range(self, high: float, low: float) -> float:
+        pc = self.last_close
+        return max(high - low, abs(high - pc), abs(low - pc))
+
+    def update(self, high: float, low: float, c: float, t: int) -> None:
+        """Commit one closed bar."""
+        kf = 2.0 / (self.ema_fast_p + 1.0)
+        ks = 2.0 / (self.ema_slow_p + 1.0)
+        self.ef_prev, self.ef = self.ef, self.ef + (c - self.ef) * kf
+        self.es_prev, self.es = self.es, self.es + (c - self.es) * ks
+
+        d = c - self.last_close
+        p = self.rsi_p
+        self.ag = (self.ag * (p - 1) + (d if d > 0.0 else 0.0)) / p
+        self.al = (self.al * (p - 1) + (-d if d < 0.0 else 0.0)) / p
+
+        self.tr_buf[self.tr_idx] = self._true_range(high, low)
+        self.tr_idx = (self.tr_idx + 1) % self.atr_p
+        self.last_close = c
+        self.last_time = t
+
+    def peek(self, high: float, low: float, c: float) -> tuple[float, ...]:
+        """(ema_fast, ema_slow, rsi, atr, slope_fast, slope_slow) with the forming bar folded in."""
+        ef = self.ef + (c - self.ef) * (2.0 / (self.ema_fast_p + 1.0))
+        es = self.es + (c - self.es) * (2.0 / (self.ema_slow_p + 1.0))
+
+        d = c - self.last_close
+        p = self.rsi_p
+        ag = (self.ag * (p - 1) + (d if d > 0.0 else 0.0)) / p
+        al = (self.al * (p - 1) + (-d if d < 0.0 else 0.0)) / p
+        rsi = 100.0 - (100.0 / (1.0 + ag / (al + EPSILON)))
+
+        # the forming TR replaces the oldest ring entry
+        tr_sum = float(self.tr_buf.sum()) - self.tr_buf[self.tr_idx] + self._true_range(high, low)
+        atr = tr_sum / self.atr_p
+
+        return ef, es, rsi, atr, ef - self.ef_prev, es - self.es_prev
+
+
+# ---- per-(symbol, timeframe) registry ----
+_STATES: dict[tuple[str, str], IndState] = {}
+
+
+def _bar_times(bars: DataFrame) -> np.ndarray:
+    """Bar open times as int64 (same source as `bars_signature`)."""
+    times = bars["time"] if "time" in bars.columns else bars.index
+    return np.asarray(times.astype("int64"))
+
+
+def streaming_indicators(
+    symbol: str,
+    timeframe: str,
+    bars: DataFrame,
+    closes: np.ndarray,
+    *,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    ema_fast_p: int,
+    ema_slow_p: int,
+    rsi_p: int,
+    atr_p: int,
+) -> tuple[float, ...]:
+    """
+    Indicators for the last bar of `bars`, updating the stored state in O(new bars).
+
+    The first call (or a period change, or a gap larger than the window) warms the
+    state from every closed bar in `bars`; afterwards only newly closed bars are
+    committed and the forming bar is peeked. Returns all-NaN on too short a history.
+    """
+    n = len(closes)
+    if n < max(ema_fast_p, ema_slow_p, rsi_p + 1, atr_p + 1) + 2:
+        nan = float("nan")
+        return nan, nan, nan, nan, nan, nan
+
+    times = _bar_times(bars)
+    key = (symbol, timeframe)
+    state = _STATES.get(key)
+
+    periods = (ema_fast_p, ema_slow_p, rsi_p, atr_p)
+
+    start = -1
+    if (
+        state is not None
+        and (state.ema_fast_p, state.ema_slow_p, state.rsi_p, state.atr_p) == periods
+    ):
+        start = int(np.searchsorted(times, state.last_time, side="right"))
+        if start == 0 or start > n - 1 or times[start - 1] != state.last_time:
+            start = -1  # committed bar left the window (or history was rewritten)
+
+    if start < 0:
+        state = IndState.from_history(
+            closes[:-1],
+            highs[:-1],
+            lows[:-1],
+            int(times[-2]),
+            ema_fast_p=ema_fast_p,
+            ema_slow_p=ema_slow_p,
+            rsi_p=rsi_p,
+            atr_p=atr_p,
+        )
+        _STATES[key] = state
+    else:
+        for i in range(start, n - 1):
+            state.update(float(highs[i]), float(lows[i]), float(closes[i]), int(times[i]))
+
+    return state.peek(float(highs[-1]), float(lows[-1]), float(closes[-1]))
+
+
+def reset_states() -> None:
+    """Drop all streaming state (next call re-warms from history)."""
+    _STATES.clear()
@@ -4,21 +4,17 @@ import numpy as np
 import pandas as pd
 
 from app.market.data import get_rates
-from app.util.ta import atr
+from app.util.envparse import parse_float, parse_int
+from app.util.mt5_bars import as_f64
+from app.util.ta import atr_last
 
 
 def _envf(name, dflt):  # float env
-    try:
-        return float(os.getenv(name, str(dflt)).split("#", 1)[0].strip())
-    except:
-        return dflt
+    return parse_float(os.getenv(name), dflt)
 
 
 def _envi(name, dflt):  # int env
-    try:
-        return int(float(os.getenv(name, str(dflt)).split("#", 1)[0].strip()))
-    except:
-        return dflt
+    return parse_int(os.getenv(name), dflt)
 
 
 def bollinger_breakout_signal(symbol: str, timeframe: str = "M15") -> dict:
@@ -36,9 +32,9 @@ def bollinger_breakout_signal(symbol: str, timeframe: str = "M15") -> dict:
     if df is None or df.empty:
         return {"debug": {"len": 0}, "why": ["no data"]}
 
-    closes = df["close"].to_numpy(float)
-    highs = df["high"].to_numpy(float)
-    lows = df["low"].to_numpy(float)
+    closes = as_f64(df["close"])
+    highs = as_f64(df["high"])
+    lows = as_f64(df["low"])
 
     ma = pd.Series(closes).rolling(P).mean().to_numpy()
     sd = pd.Series(closes).rolling(P).std(ddof=0).to_numpy()
@@ -46,8 +42,8 @@ def bollinger_breakout_signal(symbol: str, timeframe: str = "M15") -> dict:
     lower = ma - K * sd
 
     # ATR for SL/TP sizing & market filter
-    atr14 = atr(highs, lows, closes, 14)
-    a = float(atr14[-1]) if not np.isnan(atr14[-1]) else None
+    atr14 = atr_last(highs, lows, closes, 14)
+    a = atr14 if not np.isnan(atr14) else None
 
     price = float(closes[-1])
     u = float(upper[-1]) if not np.isnan(upper[-1]) else None
@@ -37,7 +37,9 @@ def equities_momentum_signal(
     short_th = _env_int("EQ_RSI_SHORT_TH", 45)
     eps = _env_float("EQ_EPS", 0.25)
 
-    close = df["close"].astype(float)
+    close = df["close"]
+    if close.dtype != "float64":
+        close = close.astype(float)
     if len(close) < max(ema_slow_n, ema_fast_n, rsi_p) + 5:
         return None
 
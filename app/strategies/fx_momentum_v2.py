@@ -13,6 +13,7 @@ from pandas import DataFrame
 
 from app.util.indicators import compute_ema as ema
 from app.util.indicators import compute_rsi as rsi
+from app.util.mt5_bars import as_f64
 from app.util.mt5_bars import get_bars as _get_bars
 
 # ============================================================
@@ -32,7 +33,7 @@ def _norm_key(symbol: str) -> str:
     return symbol.replace("-", "_").replace(".", "_").upper()
 
 
-def _atr(highs: list[float], lows: list[float], closes: list[float], period: int) -> float:
+def _atr(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int) -> float:
     """Compute ATR using True Range."""
     if len(highs) < period + 1:
         return float("nan")
@@ -66,9 +67,9 @@ def fx_momentum_features(
     if bars is None or bars.empty or len(bars) < 80:
         return {"accepted": False, "symbol": symbol, "why": ["no features"]}
 
-    closes = bars["close"].tolist()
-    highs = bars["high"].tolist()
-    lows = bars["low"].tolist()
+    closes = as_f64(bars["close"])
+    highs = as_f64(bars["high"])
+    lows = as_f64(bars["low"])
     price = float(closes[-1])
     key = _norm_key(symbol)
 
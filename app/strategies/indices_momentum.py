@@ -5,7 +5,7 @@ from typing import Any
 
 import numpy as np
 
-from app.util.mt5_bars import get_bars
+from app.util.mt5_bars import as_f64, get_bars_cached
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +17,7 @@ RSI_SHORT_DEFAULT = 40.0
 EPSILON_MIN = 1e-9
 
 
-def compute_ema(values: list[float], period: int) -> float:
+def compute_ema(values: list[float] | np.ndarray, period: int) -> float:
     """Compute EMA using numpy for stability."""
     weights = np.exp(np.linspace(-1.0, 0.0, period))
     weights /= weights.sum()
@@ -25,7 +25,7 @@ def compute_ema(values: list[float], period: int) -> float:
     return float(ema[-1])
 
 
-def compute_rsi(values: list[float], period: int) -> float:
+def compute_rsi(values: list[float] | np.ndarray, period: int) -> float:
     """Compute RSI with numpy operations."""
     deltas = np.diff(values)
     seed = deltas[:period]
@@ -81,11 +81,11 @@ def indices_momentum_features(
         )
 
         # Get candles
-        df = get_bars(symbol, timeframe, ema_slow + 5)
+        df = get_bars_cached(symbol, timeframe, ema_slow + 5)
         if df is None or len(df) < ema_slow + 5:
             return {"accepted": False, "note": "no_data"}
 
-        closes = df["close"].astype(float).tolist()
+        closes = as_f64(df["close"])
 
         ema_fast_val = float(compute_ema(closes, ema_fast))
         ema_slow_val = float(compute_ema(closes, ema_slow))
@@ -5,19 +5,32 @@
 
 from __future__ import annotations
 
+import logging
+import math
 from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 import numpy as np
 from pandas import DataFrame
 
-from app.util.indicators import compute_ema as ema
-from app.util.indicators import compute_rsi as rsi
-from app.util.mt5_bars import get_bars as _get_bars
+from app.strategies._state import streaming_indicators
+from app.util.indicator_cache import bars_signature, cached_indicators
+from app.util.indicators import compute_emas_rsi
+from app.util.mt5_bars import as_f64
+from app.util.mt5_bars import get_bars_cached as _get_bars
 
 # ---- constants ----
 MIN_BARS_REQUIRED = 80
 DEFAULT_ATR_PERIOD = 14
+# (regime, side, why) indexed by up + 2 * down; up and down are mutually exclusive
+REGIME_TABLE = (
+    ("no_trade", "", "no_signal"),
+    ("TRENDING_UP", "LONG", "conditions_met"),
+    ("TRENDING_DOWN", "SHORT", "conditions_met"),
+)
+logger = logging.getLogger(__name__)
 
 
 def _env_get(env: Mapping[str, str], key: str, cast: Callable = float, default=None):
@@ -44,7 +57,88 @@ def _norm_key(symbol: str) -> str:
     return up
 
 
-def _atr(highs: list[float], lows: list[float], closes: list[float], period: int) -> float:
+@dataclass(frozen=True, slots=True)
+class IdxParams:
+    """Per-symbol parameters resolved once from env (safe defaults tuned for NAS100)."""
+
+    ema_fast_p: int
+    ema_slow_p: int
+    rsi_p: int
+    rsi_long: float
+    rsi_short: float
+    rsi_band: float
+    atr_p: int
+    atr_min: float
+    sep_k: float
+    eps: float
+    use_atr_sl: bool
+    atr_sl_mult: float
+    atr_tp_mult: float
+    sl_pips: float
+    tp_pips: float
+    streaming: bool
+
+
+@lru_cache(maxsize=32)
+def _param_names(key: str) -> tuple[str, ...]:
+    """Env key names read for `key`, in the order `_parse_idx_params` expects them."""
+    return (
+        f"EMA_FAST_{key}",
+        f"EMA_SLOW_{key}",
+        f"RSI_PERIOD_{key}",
+        f"RSI_LONG_TH_{key}",
+        f"RSI_SHORT_TH_{key}",
+        f"RSI_BAND_{key}",
+        f"ATR_PERIOD_{key}",
+        f"ATR_MIN_{key}",
+        f"EMA_SEP_K_{key}",
+        f"EPS_{key}",
+        "INDEX_ATR_ENABLED",
+        "INDEX_ATR_SL_MULT",
+        "INDEX_ATR_TP_MULT",
+        f"SL_PIPS_{key}",
+        f"TP_PIPS_{key}",
+        "INDEX_STREAMING",
+    )
+
+
+@lru_cache(maxsize=32)
+def _parse_idx_params(key: str, raw: tuple[str | None, ...]) -> IdxParams:
+    env = {k: v for k, v in zip(_param_names(key), raw, strict=True) if v is not None}
+    return IdxParams(
+        ema_fast_p=_env_get(env, f"EMA_FAST_{key}", int, 20),
+        ema_slow_p=_env_get(env, f"EMA_SLOW_{key}", int, 50),
+        rsi_p=_env_get(env, f"RSI_PERIOD_{key}", int, 14),
+        rsi_long=_env_get(env, f"RSI_LONG_TH_{key}", float, 60.0),
+        rsi_short=_env_get(env, f"RSI_SHORT_TH_{key}", float, 40.0),
+        rsi_band=_env_get(env, f"RSI_BAND_{key}", float, 3.0),
+        atr_p=_env_get(env, f"ATR_PERIOD_{key}", int, DEFAULT_ATR_PERIOD),
+        # NAS100 typical 15m ATR tens of points; start with 30 as min filter
+        atr_min=_env_get(env, f"ATR_MIN_{key}", float, 30.0),
+        # how far EMAs must be separated (k * ATR) to avoid flat crosses
+        sep_k=_env_get(env, f"EMA_SEP_K_{key}", float, 0.6),
+        # execution epsilon (point rounding / spread cushion)
+        eps=_env_get(env, f"EPS_{key}", float, 0.5),
+        use_atr_sl=env.get("INDEX_ATR_ENABLED", "false").lower() == "true",
+        atr_sl_mult=_env_get(env, "INDEX_ATR_SL_MULT", float, 1.0),
+        atr_tp_mult=_env_get(env, "INDEX_ATR_TP_MULT", float, 2.0),
+        # static SL/TP in points (indices "pips" == points here)
+        sl_pips=_env_get(env, f"SL_PIPS_{key}", float, 80.0),
+        tp_pips=_env_get(env, f"TP_PIPS_{key}", float, 160.0),
+        # O(1) per-tick indicator updates from per-symbol state (experimental)
+        streaming=env.get("INDEX_STREAMING", "false").lower() == "true",
+    )
+
+
+def _idx_params(env: Mapping[str, str], key: str) -> IdxParams:
+    """
+    Resolve parameters for `key`. Parsing is memoized on the raw env strings, so a
+    changed value is picked up on the next call while unchanged env skips all casts.
+    """
+    return _parse_idx_params(key, tuple(map(env.get, _param_names(key))))
+
+
+def _atr(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int) -> float:
     """Average True Range using simple mean of TR over last 'period' bars."""
     if len(highs) < period + 1:
         return float("nan")
@@ -61,6 +155,25 @@ def _atr(highs: list[float], lows: list[float], closes: list[float], period: int
     return float(np.mean(tr[-period:]))
 
 
+def _indicators(
+    closes: np.ndarray,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    *,
+    ema_fast_p: int,
+    ema_slow_p: int,
+    rsi_p: int,
+    atr_p: int,
+) -> tuple[float, ...]:
+    """Last-value EMA fast/slow, RSI, ATR and the two EMA slopes."""
+    # One fused pass: EMAs, RSI and the EMA slopes over the last 2 bars
+    ema_fast, ema_slow, rsi_val, slope_fast, slope_slow = compute_emas_rsi(
+        closes, ema_fast_p, ema_slow_p, rsi_p
+    )
+    atr_val = _atr(highs, lows, closes, atr_p)
+    return ema_fast, ema_slow, rsi_val, atr_val, slope_fast, slope_slow
+
+
 def indices_momentum_features(
     symbol: str,
     timeframe: str,
@@ -74,64 +187,56 @@ def indices_momentum_features(
     if bars is None or bars.empty or len(bars) < MIN_BARS_REQUIRED:
         return {"accepted": False, "symbol": symbol, "why": ["no features"]}
 
-    closes = bars["close"].astype(float).tolist()
-    highs = bars["high"].astype(float).tolist()
-    lows = bars["low"].astype(float).tolist()
+    closes = as_f64(bars["close"])
+    highs = as_f64(bars["high"])
+    lows = as_f64(bars["low"])
     price = float(closes[-1])
 
     key = _norm_key(symbol)  # -> "NAS100" for NAS100-ECNc
-
-    # -----------------------------
-    # Parameters (with safe defaults tuned for NAS100)
-    # -----------------------------
-    ema_fast_p_val = _env_get(env, f"EMA_FAST_{key}", int, 20)
-    ema_fast_p: int = int(ema_fast_p_val if ema_fast_p_val is not None else 20)
-    ema_slow_p_val = _env_get(env, f"EMA_SLOW_{key}", int, 50)
-    ema_slow_p: int = int(ema_slow_p_val if ema_slow_p_val is not None else 50)
-    rsi_p_val = _env_get(env, f"RSI_PERIOD_{key}", int, 14)
-    rsi_p: int = int(rsi_p_val if rsi_p_val is not None else 14)
-    rsi_long_val = _env_get(env, f"RSI_LONG_TH_{key}", float, 60.0)
-    rsi_long: float = float(rsi_long_val if rsi_long_val is not None else 60.0)
-    rsi_short_val = _env_get(env, f"RSI_SHORT_TH_{key}", float, 40.0)
-    rsi_short: float = float(rsi_short_val if rsi_short_val is not None else 40.0)
-    rsi_band_val = _env_get(env, f"RSI_BAND_{key}", float, 3.0)
-    rsi_band: float = float(rsi_band_val if rsi_band_val is not None else 3.0)
-
-    atr_p_val = _env_get(env, f"ATR_PERIOD_{key}", int, DEFAULT_ATR_PERIOD)
-    atr_p: int = int(atr_p_val if atr_p_val is not None else DEFAULT_ATR_PERIOD)
-    # NAS100 typical 15m ATR tens of points; start with 30 as min filter
-    atr_min_val = _env_get(env, f"ATR_MIN_{key}", float, 30.0)
-    atr_min: float = float(atr_min_val if atr_min_val is not None else 30.0)
-
-    # how far EMAs must be separated (k * ATR) to avoid flat crosses
-    sep_k_val = _env_get(env, f"EMA_SEP_K_{key}", float, 0.6)
-    sep_k: float = float(sep_k_val if sep_k_val is not None else 0.6)
-
-    # execution epsilon (point rounding / spread cushion)
-    eps_val = _env_get(env, f"EPS_{key}", float, 0.5)
-    eps: float = float(eps_val if eps_val is not None else 0.5)
+    p = _idx_params(env, key)
 
     # -----------------------------
     # Indicators
     # -----------------------------
-    ema_fast = ema(closes, ema_fast_p)
-    ema_slow = ema(closes, ema_slow_p)
-    rsi_val = rsi(closes, rsi_p)
-    atr_val = _atr(highs, lows, closes, atr_p)
+    if p.streaming:
+        # Only newly closed bars are folded into the stored state; the forming bar is peeked.
+        ema_fast, ema_slow, rsi_val, atr_val, slope_fast, slope_slow = streaming_indicators(
+            symbol,
+            timeframe,
+            bars,
+            closes,
+            highs=highs,
+            lows=lows,
+            ema_fast_p=p.ema_fast_p,
+            ema_slow_p=p.ema_slow_p,
+            rsi_p=p.rsi_p,
+            atr_p=p.atr_p,
+        )
+    else:
+        # Repeat polls within the same bar/tick hit the cache instead of recomputing.
+        ema_fast, ema_slow, rsi_val, atr_val, slope_fast, slope_slow = cached_indicators(
+            (
+                "indices_v2",
+                bars_signature(symbol, timeframe, bars),
+                p.ema_fast_p,
+                p.ema_slow_p,
+                p.rsi_p,
+                p.atr_p,
+            ),
+            lambda: _indicators(
+                closes,
+                highs,
+                lows,
+                ema_fast_p=p.ema_fast_p,
+                ema_slow_p=p.ema_slow_p,
+                rsi_p=p.rsi_p,
+                atr_p=p.atr_p,
+            ),
+        )
 
-    if any(np.isnan(x) for x in (ema_fast, ema_slow, rsi_val, atr_val)):
+    if math.isnan(ema_fast) or math.isnan(ema_slow) or math.isnan(rsi_val) or math.isnan(atr_val):
         return {"accepted": False, "symbol": symbol, "why": ["invalid_indicators"]}
 
-    # EMA slopes (short EMA of last window vs 2 bars back)
-    slope_win_fast = max(2, ema_fast_p // 2)
-    slope_win_slow = max(2, ema_slow_p // 2)
-    slope_fast = ema(closes[-ema_fast_p:], slope_win_fast) - ema(
-        closes[-ema_fast_p - 2 : -2], slope_win_fast
-    )
-    slope_slow = ema(closes[-ema_slow_p:], slope_win_slow) - ema(
-        closes[-ema_slow_p - 2 : -2], slope_win_slow
-    )
-
     sep = abs(ema_fast - ema_slow)
 
     regime = "no_trade"
@@ -141,56 +246,57 @@ def indices_momentum_features(
     # -----------------------------
     # Filters & signal
     # -----------------------------
-    if atr_val < atr_min:
+    if atr_val < p.atr_min:
         why.append("atr_below_min")
-    elif sep < sep_k * atr_val:
+    elif sep < p.sep_k * atr_val:
         why.append("ema_separation_insufficient")
-    elif (
-        ema_fast > ema_slow
-        and slope_fast > 0
-        and slope_slow > 0
-        and rsi_val > (rsi_long + rsi_band)
-    ):
-        regime, side = "TRENDING_UP", "LONG"
-        why.append("conditions_met")
-    elif (
-        ema_fast < ema_slow
-        and slope_fast < 0
-        and slope_slow < 0
-        and rsi_val < (rsi_short - rsi_band)
-    ):
-        regime, side = "TRENDING_DOWN", "SHORT"
-        why.append("conditions_met")
     else:
-        why.append("no_signal")
+        # Branchless signal mask: all four conditions evaluated, table picks the outcome
+        up = (
+            (ema_fast > ema_slow)
+            & (slope_fast > 0)
+            & (slope_slow > 0)
+            & (rsi_val > (p.rsi_long + p.rsi_band))
+        )
+        down = (
+            (ema_fast < ema_slow)
+            & (slope_fast < 0)
+            & (slope_slow < 0)
+            & (rsi_val < (p.rsi_short - p.rsi_band))
+        )
+        regime, side, reason = REGIME_TABLE[up + 2 * down]
+        why.append(reason)
 
     # -----------------------------
     # ATR-based SL/TP (points) with safe fallback
     # -----------------------------
-    use_atr_sl = env.get("INDEX_ATR_ENABLED", "false").lower() == "true"
-    atr_sl_mult_val = _env_get(env, "INDEX_ATR_SL_MULT", float, 1.0)
-    atr_sl_mult: float = float(atr_sl_mult_val if atr_sl_mult_val is not None else 1.0)
-    atr_tp_mult_val = _env_get(env, "INDEX_ATR_TP_MULT", float, 2.0)
-    atr_tp_mult: float = float(atr_tp_mult_val if atr_tp_mult_val is not None else 2.0)
-
-    if use_atr_sl and atr_val > 0:
-        sl_pips = max(atr_sl_mult * atr_val, 10.0)  # min 10 points
-        tp_pips = max(atr_tp_mult * atr_val, 20.0)
+    if p.use_atr_sl and atr_val > 0:
+        sl_pips = max(p.atr_sl_mult * atr_val, 10.0)  # min 10 points
+        tp_pips = max(p.atr_tp_mult * atr_val, 20.0)
     else:
         # Fallback static SL/TP in points (indices “pips” == points here)
-        sl_pips_val = _env_get(env, f"SL_PIPS_{key}", float, 80.0)
-        sl_pips = float(sl_pips_val if sl_pips_val is not None else 80.0)
-        tp_pips_val = _env_get(env, f"TP_PIPS_{key}", float, 160.0)
-        tp_pips = float(tp_pips_val if tp_pips_val is not None else 160.0)
-
-    print(
-        f"[IDX SLTP] {symbol} sl={sl_pips:.1f} tp={tp_pips:.1f} "
-        f"(ATR={atr_val:.2f}, sep={sep:.2f}, k={sep_k})"
+        sl_pips = p.sl_pips
+        tp_pips = p.tp_pips
+
+    logger.debug(
+        "[IDX SLTP] %s sl=%.1f tp=%.1f (ATR=%.2f, sep=%.2f, k=%s)",
+        symbol,
+        sl_pips,
+        tp_pips,
+        atr_val,
+        sep,
+        p.sep_k,
     )
-    print(
-        f"[IDX DEBUG] {symbol} regime={regime} side={side} "
-        f"EMAf={ema_fast:.2f} EMAs={ema_slow:.2f} slope_f={slope_fast:.4f} slope_s={slope_slow:.4f} "
-        f"RSI={rsi_val:.2f}"
+    logger.debug(
+        "[IDX DEBUG] %s regime=%s side=%s EMAf=%.2f EMAs=%.2f slope_f=%.4f slope_s=%.4f RSI=%.2f",
+        symbol,
+        regime,
+        side,
+        ema_fast,
+        ema_slow,
+        slope_fast,
+        slope_slow,
+        rsi_val,
     )
 
     return {
@@ -203,22 +309,22 @@ def indices_momentum_features(
         "ema_slow": ema_slow,
         "rsi": rsi_val,
         "atr": atr_val,
-        "eps": eps,
+        "eps": p.eps,
         "params": {
             "sl_pips": sl_pips,
             "tp_pips": tp_pips,
-            "rsi_long_th": rsi_long,
-            "rsi_short_th": rsi_short,
-            "rsi_period": rsi_p,
+            "rsi_long_th": p.rsi_long,
+            "rsi_short_th": p.rsi_short,
+            "rsi_period": p.rsi_p,
         },
         "features": {
             "ema_slope_fast": slope_fast,
             "ema_slope_slow": slope_slow,
             "sep": sep,
-            "sep_k": sep_k,
-            "rsi_band": rsi_band,
-            "atr_min": atr_min,
-            "atr_p": atr_p,
+            "sep_k": p.sep_k,
+            "rsi_band": p.rsi_band,
+            "atr_min": p.atr_min,
+            "atr_p": p.atr_p,
             "timeframe": timeframe,
         },
         "why": why,
@@ -1,66 +1,112 @@
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 
 import numpy as np
 
-from app.market.data import get_rates
+from app.market.data import get_rates_cached
+from app.util.envparse import parse_float, parse_int
+from app.util.indicator_cache import bars_signature, cached_indicators
+from app.util.mt5_bars import as_f64
 
+_CFG_KEYS = ("MACD_FAST", "MACD_SLOW", "MACD_SIGNAL", "MACD_MIN_HIST")
+_MIN_BARS = 2  # the cross test reads hist at the last and previous bar
 
-def _envf(name, dflt):
-    try:
-        return float(os.getenv(name, str(dflt)).split("#", 1)[0].strip())
-    except:
-        return dflt
 
+@dataclass(frozen=True, slots=True)
+class MacdParams:
+    fast: int
+    slow: int
+    signal: int
+    hist_min: float  # optional min histogram magnitude
 
-def _envi(name, dflt):
-    try:
-        return int(float(os.getenv(name, str(dflt)).split("#", 1)[0].strip()))
-    except:
-        return dflt
 
+@lru_cache(maxsize=8)
+def _parse_cfg(raw: tuple[str | None, ...]) -> MacdParams:
+    fast, slow, sig, hist_min = raw
+    return MacdParams(
+        fast=parse_int(fast, 12),
+        slow=parse_int(slow, 26),
+        signal=parse_int(sig, 9),
+        hist_min=parse_float(hist_min, 0.0),
+    )
 
-def _ema(arr, period):
+
+def _macd_cfg() -> MacdParams:
+    """MACD settings from env; parsed once per distinct set of raw values."""
+    return _parse_cfg(tuple(map(os.getenv, _CFG_KEYS)))
+
+
+def _ema_operator(period: int, length: int) -> np.ndarray:
+    """
+    (length, length) matrix E with E @ x == EMA(x) for the recurrence seeded at x[0]:
+    E[t, i] = a * (1 - a) ** (t - i) for 1 <= i <= t, E[t, 0] = (1 - a) ** t.
+    """
     alpha = 2.0 / (period + 1.0)
-    out = np.empty_like(arr, dtype=float)
-    out[0] = arr[0]
-    for i in range(1, len(arr)):
-        out[i] = alpha * arr[i] + (1 - alpha) * out[i - 1]
-    return out
+    beta = 1.0 - alpha
+    lag = np.arange(length)[:, None] - np.arange(length)[None, :]
+    op = np.where(lag >= 0, alpha * beta ** np.maximum(lag, 0), 0.0)
+    op[:, 0] = beta ** np.arange(length)
+    return op
+
+
+@lru_cache(maxsize=16)
+def _macd_weights(fast: int, slow: int, sig: int, length: int) -> np.ndarray:
+    """
+    Rows: macd[-1], signal[-1], hist[-1], hist[-2] as weights over the closes.
+    MACD, its signal EMA and the histogram are all linear in the closes, so one
+    (4, length) matrix per parameter set replaces the three recurrences.
+    """
+    macd_op = _ema_operator(fast, length) - _ema_operator(slow, length)
+    signal_rows = _ema_operator(sig, length)[-2:] @ macd_op
+    w = np.vstack(
+        [
+            macd_op[-1],
+            signal_rows[1],
+            macd_op[-1] - signal_rows[1],
+            macd_op[-2] - signal_rows[0],
+        ]
+    )
+    w.setflags(write=False)
+    return w
+
+
+def _macd_last(closes, fast, slow, sig):
+    """(macd, signal, hist) at the last bar plus hist at the previous bar."""
+    macd, signal, hist, hist_prev = _macd_weights(fast, slow, sig, len(closes)) @ closes
+    return float(macd), float(signal), float(hist), float(hist_prev)
 
 
 def macd_crossover_signal(symbol: str, timeframe: str = "M15") -> dict:
-    FAST = _envi("MACD_FAST", 12)
-    SLOW = _envi("MACD_SLOW", 26)
-    SIG = _envi("MACD_SIGNAL", 9)
-    HIST_MIN = _envf("MACD_MIN_HIST", 0.0)  # optional min histogram magnitude
+    cfg = _macd_cfg()
+    FAST, SLOW, SIG, HIST_MIN = cfg.fast, cfg.slow, cfg.signal, cfg.hist_min
 
-    df = get_rates(symbol, timeframe, count=max(300, SLOW + SIG + 20))
+    df = get_rates_cached(symbol, timeframe, max(300, SLOW + SIG + 20))
     if df is None or df.empty:
         return {"debug": {"len": 0}, "why": ["no data"]}
 
-    closes = df["close"].to_numpy(float)
-    ema_f = _ema(closes, FAST)
-    ema_s = _ema(closes, SLOW)
-    macd = ema_f - ema_s
-    signal = _ema(macd, SIG)
-    hist = macd - signal
+    closes = as_f64(df["close"])
+    if len(closes) < _MIN_BARS:
+        return {"debug": {"len": len(closes)}, "why": ["not enough bars"]}
 
-    last = int(len(closes) - 1)
-    prev = last - 1
+    macd_last, signal_last, hist_last, hist_prev = cached_indicators(
+        ("macd", bars_signature(symbol, timeframe, df), FAST, SLOW, SIG),
+        lambda: _macd_last(closes, FAST, SLOW, SIG),
+    )
 
-    cross_up = (hist[prev] <= 0) and (hist[last] > 0)
-    cross_down = (hist[prev] >= 0) and (hist[last] < 0)
+    cross_up = (hist_prev <= 0) and (hist_last > 0)
+    cross_down = (hist_prev >= 0) and (hist_last < 0)
 
     debug = {
         "price": float(closes[-1]),
-        "macd": float(macd[-1]),
-        "signal": float(signal[-1]),
-        "hist": float(hist[-1]),
+        "macd": macd_last,
+        "signal": signal_last,
+        "hist": hist_last,
         "tf": timeframe,
         "cfg": dict(FAST=FAST, SLOW=SLOW, SIGNAL=SIG, HIST_MIN=HIST_MIN),
     }
 
-    if cross_up and abs(hist[last]) >= HIST_MIN:
+    if cross_up and abs(hist_last) >= HIST_MIN:
         return {
             "side": "LONG",
             "size": None,
@@ -71,7 +117,7 @@ def macd_crossover_signal(symbol: str, timeframe: str = "M15") -> dict:
             "debug": debug,
         }
 
-    if cross_down and abs(hist[last]) >= HIST_MIN:
+    if cross_down and abs(hist_last) >= HIST_MIN:
         return {
             "side": "SHORT",
             "size": None,
@@ -85,6 +131,6 @@ def macd_crossover_signal(symbol: str, timeframe: str = "M15") -> dict:
     why = []
     if not cross_up and not cross_down:
         why.append("no macd cross")
-    if abs(hist[last]) < HIST_MIN:
+    if abs(hist_last) < HIST_MIN:
         why.append(f"|hist|<{HIST_MIN}")
     return {"debug": debug, "why": why}
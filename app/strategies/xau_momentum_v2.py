@@ -6,15 +6,19 @@
 from __future__ import annotations
 
 import logging
+import math
 from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 import numpy as np
 from pandas import DataFrame
 
-from app.util.indicators import compute_ema as ema
-from app.util.indicators import compute_rsi as rsi
-from app.util.mt5_bars import get_bars as _get_bars
+from app.util.indicator_cache import bars_signature, cached_indicators
+from app.util.indicators import compute_emas_rsi
+from app.util.mt5_bars import as_f64
+from app.util.mt5_bars import get_bars_cached as _get_bars
 
 # ============================================================
 # Constants
@@ -39,11 +43,86 @@ def _norm_key(symbol: str) -> str:
     return symbol.replace("-", "_").replace(".", "_").upper()
 
 
-def _atr(highs: list[float], lows: list[float], closes: list[float], period: int) -> float:
+@dataclass(frozen=True, slots=True)
+class XauParams:
+    """Per-symbol parameters resolved once from env."""
+
+    ema_fast_p: int
+    ema_slow_p: int
+    rsi_p: int
+    rsi_long: float
+    rsi_short: float
+    rsi_band: float
+    atr_p: int
+    atr_min: float
+    sep_k: float
+    eps: float
+    use_atr_sl: bool
+    atr_sl_mult: float
+    atr_tp_mult: float
+    sl_pips: float
+    tp_pips: float
+
+
+@lru_cache(maxsize=32)
+def _param_names(key: str) -> tuple[str, ...]:
+    """Env key names read for `key`, in the order `_parse_xau_params` expects them."""
+    return (
+        f"EMA_FAST_{key}",
+        f"EMA_SLOW_{key}",
+        f"RSI_PERIOD_{key}",
+        f"RSI_LONG_TH_{key}",
+        f"RSI_SHORT_TH_{key}",
+        f"RSI_BAND_{key}",
+        f"ATR_PERIOD_{key}",
+        f"ATR_MIN_{key}",
+        f"EMA_SEP_K_{key}",
+        f"EPS_{key}",
+        "XAU_ATR_ENABLED",
+        "XAU_ATR_SL_MULT",
+        "XAU_ATR_TP_MULT",
+        f"SL_PIPS_{key}",
+        f"TP_PIPS_{key}",
+    )
+
+
+@lru_cache(maxsize=32)
+def _parse_xau_params(key: str, raw: tuple[str | None, ...]) -> XauParams:
+    env = {k: v for k, v in zip(_param_names(key), raw, strict=True) if v is not None}
+    return XauParams(
+        ema_fast_p=_env_get(env, f"EMA_FAST_{key}", int, 20),
+        ema_slow_p=_env_get(env, f"EMA_SLOW_{key}", int, 50),
+        rsi_p=_env_get(env, f"RSI_PERIOD_{key}", int, 14),
+        rsi_long=_env_get(env, f"RSI_LONG_TH_{key}", float, 60.0),
+        rsi_short=_env_get(env, f"RSI_SHORT_TH_{key}", float, 40.0),
+        rsi_band=_env_get(env, f"RSI_BAND_{key}", float, 3.0),
+        atr_p=_env_get(env, f"ATR_PERIOD_{key}", int, 14),
+        atr_min=_env_get(env, f"ATR_MIN_{key}", float, 0.50),
+        sep_k=_env_get(env, f"EMA_SEP_K_{key}", float, 0.8),
+        eps=_env_get(env, f"EPS_{key}", float, 0.10),
+        use_atr_sl=env.get("XAU_ATR_ENABLED", "false").lower() == "true",
+        atr_sl_mult=_env_get(env, "XAU_ATR_SL_MULT", float, 1.0),
+        atr_tp_mult=_env_get(env, "XAU_ATR_TP_MULT", float, 2.0),
+        sl_pips=_env_get(env, f"SL_PIPS_{key}", float, 400.0),
+        tp_pips=_env_get(env, f"TP_PIPS_{key}", float, 900.0),
+    )
+
+
+def _xau_params(env: Mapping[str, str], key: str) -> XauParams:
+    """
+    Resolve parameters for `key`. Parsing is memoized on the raw env strings, so a
+    changed value is picked up on the next call while unchanged env skips all casts.
+    """
+    return _parse_xau_params(key, tuple(map(env.get, _param_names(key))))
+
+
+def _atr(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int) -> float:
     """Compute ATR using True Range."""
     if len(highs) < period + 1:
         return float("nan")
-    h, l, c = np.array(highs), np.array(lows), np.array(closes)
+    h = np.asarray(highs, dtype=np.float64)
+    l = np.asarray(lows, dtype=np.float64)
+    c = np.asarray(closes, dtype=np.float64)
     tr = np.maximum.reduce([h[1:] - l[1:], np.abs(h[1:] - c[:-1]), np.abs(l[1:] - c[:-1])])
     return float(np.mean(tr[-period:]))
 
@@ -67,43 +146,27 @@ def xau_momentum_features(
     if bars is None or bars.empty or len(bars) < MIN_BARS_REQUIRED:
         return {"accepted": False, "symbol": symbol, "why": ["no features"]}
 
-    closes = bars["close"].tolist()
-    highs = bars["high"].tolist()
-    lows = bars["low"].tolist()
+    closes = as_f64(bars["close"])
+    highs = as_f64(bars["high"])
+    lows = as_f64(bars["low"])
     price = float(closes[-1])
-    key = _norm_key(symbol)
-
-    # --- Parameters from env ---
-    ema_fast_p = _env_get(env, f"EMA_FAST_{key}", int, 20)
-    ema_slow_p = _env_get(env, f"EMA_SLOW_{key}", int, 50)
-    rsi_p = _env_get(env, f"RSI_PERIOD_{key}", int, 14)
-    rsi_long = _env_get(env, f"RSI_LONG_TH_{key}", float, 60.0)
-    rsi_short = _env_get(env, f"RSI_SHORT_TH_{key}", float, 40.0)
-    rsi_band = _env_get(env, f"RSI_BAND_{key}", float, 3.0)
-    atr_p = _env_get(env, f"ATR_PERIOD_{key}", int, 14)
-    atr_min = _env_get(env, f"ATR_MIN_{key}", float, 0.50)
-    sep_k = _env_get(env, f"EMA_SEP_K_{key}", float, 0.8)
-    eps = _env_get(env, f"EPS_{key}", float, 0.10)
-
-    # Ensure period parameters are valid
-    if (
-        ema_fast_p is None
-        or ema_slow_p is None
-        or rsi_p is None
-        or atr_p is None
-        or rsi_long is None
-        or rsi_short is None
-        or rsi_band is None
-    ):
-        return {"accepted": False, "symbol": symbol, "why": ["invalid_period_parameter"]}
 
-    # --- Indicators ---
-    ema_fast = ema(closes, ema_fast_p)
-    ema_slow = ema(closes, ema_slow_p)
-    rsi_val = rsi(closes, rsi_p)
-    atr_val = _atr(highs, lows, closes, atr_p)
+    # --- Parameters from env (memoized per raw env values) ---
+    p = _xau_params(env, _norm_key(symbol))
+
+    # --- ATR gate first: low-volatility bars skip all EMA/RSI work ---
+    atr_val = _atr(highs, lows, closes, p.atr_p)
+    if math.isnan(atr_val) or atr_val < p.atr_min:
+        return {"accepted": False, "symbol": symbol, "why": ["atr_below_min"]}
+
+    # --- Indicators (cached per bar/tick signature) ---
+    # EMA slopes: change over the last 2 bars of the same full-series EMAs
+    ema_fast, ema_slow, rsi_val, slope_fast, slope_slow = cached_indicators(
+        ("xau_v2", bars_signature(symbol, timeframe, bars), p.ema_fast_p, p.ema_slow_p, p.rsi_p),
+        lambda: compute_emas_rsi(closes, p.ema_fast_p, p.ema_slow_p, p.rsi_p),
+    )
 
-    if np.isnan(ema_fast) or np.isnan(ema_slow) or np.isnan(rsi_val):
+    if math.isnan(ema_fast) or math.isnan(ema_slow) or math.isnan(rsi_val):
         return {"accepted": False, "symbol": symbol, "why": ["invalid_indicators"]}
 
     # --- Regime logic ---
@@ -111,21 +174,11 @@ def xau_momentum_features(
     side = ""
     sep = abs(ema_fast - ema_slow)
 
-    slope_fast = ema(closes[-ema_fast_p:], max(2, ema_fast_p // 2)) - ema(
-        closes[-ema_fast_p - 2 : -2], max(2, ema_fast_p // 2)
-    )
-    slope_slow = ema(closes[-ema_slow_p:], max(2, ema_slow_p // 2)) - ema(
-        closes[-ema_slow_p - 2 : -2], max(2, ema_slow_p // 2)
-    )
-
-    if atr_val is None or np.isnan(atr_val) or atr_min is None or atr_val < atr_min:
-        regime = "no_trade"
-        why = ["atr_below_min"]
-    elif (
+    if (
         ema_fast > ema_slow
         and slope_fast > 0
         and slope_slow > 0
-        and rsi_val > (rsi_long + rsi_band)
+        and rsi_val > (p.rsi_long + p.rsi_band)
     ):
         regime = "TRENDING_UP"
         side = "LONG"
@@ -134,7 +187,7 @@ def xau_momentum_features(
         ema_fast < ema_slow
         and slope_fast < 0
         and slope_slow < 0
-        and rsi_val < (rsi_short - rsi_band)
+        and rsi_val < (p.rsi_short - p.rsi_band)
     ):
         regime = "TRENDING_DOWN"
         side = "SHORT"
@@ -145,47 +198,45 @@ def xau_momentum_features(
     # =====================================================
     # SL/TP Logic (ATR or static fallback)
     # =====================================================
-    use_atr_sl = env.get("XAU_ATR_ENABLED", "false").lower() == "true"
-    atr_sl_mult = _env_get(env, "XAU_ATR_SL_MULT", float, 1.0)
-    atr_tp_mult = _env_get(env, "XAU_ATR_TP_MULT", float, 2.0)
-
-    if (
-        use_atr_sl
-        and atr_val is not None
-        and not np.isnan(atr_val)
-        and atr_val > 0
-        and atr_sl_mult is not None
-        and atr_tp_mult is not None
-    ):
+    if p.use_atr_sl and atr_val > 0:
         pip_mult = 10.0 if "XAU" in symbol.upper() else 1.0
-        sl_pips = max(float(atr_sl_mult) * float(atr_val) * float(pip_mult), 50.0)
-        tp_pips = max(float(atr_tp_mult) * float(atr_val) * float(pip_mult), 100.0)
+        sl_pips = max(p.atr_sl_mult * float(atr_val) * pip_mult, 50.0)
+        tp_pips = max(p.atr_tp_mult * float(atr_val) * pip_mult, 100.0)
     else:
-        sl_pips = _env_get(env, f"SL_PIPS_{key}", float, 400.0)
-        tp_pips = _env_get(env, f"TP_PIPS_{key}", float, 900.0)
+        sl_pips = p.sl_pips
+        tp_pips = p.tp_pips
 
-    logger.info(f"[SLTP] {symbol} sl_pips={sl_pips:.2f} tp_pips={tp_pips:.2f} (ATR={atr_val:.3f})")
+    logger.info("[SLTP] %s sl_pips=%.2f tp_pips=%.2f (ATR=%.3f)", symbol, sl_pips, tp_pips, atr_val)
 
     # =====================================================
     # Debug deltas — how far from trigger
     # =====================================================
-    rsi_gap_long = rsi_val - rsi_long
-    rsi_gap_short = rsi_short - rsi_val
-    ema_sep_atr = sep / max(atr_val, 1e-6)
-
-    logger.info(
-        f"[DEBUG_DELTA] {symbol} RSI={rsi_val:.2f} "
-        f"(gap_long={rsi_gap_long:+.2f}, gap_short={rsi_gap_short:+.2f}) | "
-        f"EMA_sep={sep:.3f} ({ema_sep_atr:.2f} ATRs)"
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "[DEBUG_DELTA] %s RSI=%.2f (gap_long=%+.2f, gap_short=%+.2f) | "
+            "EMA_sep=%.3f (%.2f ATRs)",
+            symbol,
+            rsi_val,
+            rsi_val - p.rsi_long,
+            p.rsi_short - rsi_val,
+            sep,
+            sep / max(atr_val, 1e-6),
+        )
 
     # =====================================================
     # Final return payload
     # =====================================================
-    logger.info(
-        f"[DEBUG] {symbol} regime={regime} | side={side} | "
-        f"EMA_FAST={ema_fast:.3f} | EMA_SLOW={ema_slow:.3f} | "
-        f"RSI={rsi_val:.2f} | ATR={atr_val:.3f} | sep={sep:.3f}"
+    logger.debug(
+        "[DEBUG] %s regime=%s | side=%s | EMA_FAST=%.3f | EMA_SLOW=%.3f | "
+        "RSI=%.2f | ATR=%.3f | sep=%.3f",
+        symbol,
+        regime,
+        side,
+        ema_fast,
+        ema_slow,
+        rsi_val,
+        atr_val,
+        sep,
     )
 
     return {
@@ -198,22 +249,22 @@ def xau_momentum_features(
         "ema_slow": ema_slow,
         "rsi": rsi_val,
         "atr": atr_val,
-        "eps": eps,
+        "eps": p.eps,
         "params": {
             "sl_pips": sl_pips,
             "tp_pips": tp_pips,
-            "rsi_long_th": rsi_long,
-            "rsi_short_th": rsi_short,
-            "rsi_period": rsi_p,
+            "rsi_long_th": p.rsi_long,
+            "rsi_short_th": p.rsi_short,
+            "rsi_period": p.rsi_p,
         },
         "features": {
             "ema_slope_fast": slope_fast,
             "ema_slope_slow": slope_slow,
             "sep": sep,
-            "sep_k": sep_k,
-            "rsi_band": rsi_band,
-            "atr_min": atr_min,
-            "atr_p": atr_p,
+            "sep_k": p.sep_k,
+            "rsi_band": p.rsi_band,
+            "atr_min": p.atr_min,
+            "atr_p": p.atr_p,
             "timeframe": timeframe,
         },
         "why": why,
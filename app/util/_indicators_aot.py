@@ -0,0 +1,44 @@
+# app/util/_indicators_aot.py
+"""
+Ahead-of-time build of the `app.util.ta` kernels.
+
+    python -m app.util._indicators_aot
+
+writes `app/util/indicators_aot.<platform>.so` from the same Python source as
+the njit kernels. `ta` imports it when present, so the first decision after a
+restart skips JIT compilation and numba cache loading. Without the extension
+`ta` falls back to numba JIT, then to plain Python.
+
+Requires numba (numba.pycc) and a C compiler at build time only.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from numba.pycc import CC
+
+from app.util.ta import (
+    _atr_kernel,
+    _atr_last_kernel,
+    _ema_kernel,
+    _ema_last_kernel,
+    _rsi_last_kernel,
+    _rsi_wilder,
+)
+
+cc = CC("indicators_aot")
+cc.output_dir = str(Path(__file__).resolve().parent)
+
+# signatures match how ta.py calls the kernels (contiguous float64, int64 period)
+cc.export("ema_kernel", "f8[:](f8[:], i8)")(_ema_kernel.py_func)
+cc.export("rsi_wilder", "void(f8[:], i8, f8, f8, f8[:])")(_rsi_wilder.py_func)
+cc.export("atr_kernel", "f8[:](f8[:], f8[:], f8[:], i8)")(_atr_kernel.py_func)
+cc.export("ema_last", "f8(f8[:], i8)")(_ema_last_kernel.py_func)
+cc.export("rsi_last", "f8(f8[:], i8, f8, f8)")(_rsi_last_kernel.py_func)
+cc.export("atr_last", "f8(f8[:], f8[:], f8[:], i8)")(_atr_last_kernel.py_func)
+
+
+if __name__ == "__main__":
+    cc.compile()
+    print(f"[AOT] built {cc.name} in {cc.output_dir}")
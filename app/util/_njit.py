@@ -0,0 +1,33 @@
+# app/util/_njit.py
+"""
+Numba `njit` with a pure-Python fallback.
+
+Numba is optional: when it is missing the decorated kernels run as plain
+Python loops, which is slower but produces identical results.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+try:
+    from numba import njit, prange
+
+    HAS_NUMBA = True
+except ImportError:  # pragma: no cover - depends on the install
+    HAS_NUMBA = False
+    prange = range
+
+    def njit(*args: Any, **kwargs: Any) -> Any:  # type: ignore[no-redef]
+        """No-op stand-in supporting both `@njit` and `@njit(cache=True, ...)`."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def _wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+            return fn
+
+        return _wrap
+
+
+__all__ = ["HAS_NUMBA", "njit", "prange"]
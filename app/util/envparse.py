@@ -0,0 +1,37 @@
+# app/util/envparse.py
+"""
+Env-string parsing shared by the strategies and guards.
+
+Values may carry a trailing `# comment` (as written in .env). Parsing is
+memoized on the raw string, so edits to the environment still apply on the
+next call while repeated reads of an unchanged value cost a dict lookup.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=128)
+def parse_float(raw: str | None, default: float) -> float:
+    """Float from an env string; `default` when unset, empty or malformed."""
+    if raw is None:
+        return default
+    try:
+        return float(raw.split("#", 1)[0].strip())
+    except ValueError:
+        return default
+
+
+@lru_cache(maxsize=128)
+def parse_int(raw: str | None, default: int) -> int:
+    """Int from an env string (via float, so "2.0" works); `default` when unusable."""
+    if raw is None:
+        return default
+    try:
+        return int(float(raw.split("#", 1)[0].strip()))
+    except (ValueError, OverflowError):  # "nan" / "inf" cannot become an int
+        return default
+
+
+__all__ = ["parse_float", "parse_int"]
@@ -0,0 +1,58 @@
+# ============================================================
+# app/util/indicator_cache.py
+# Agentic Trader - Last-value indicator cache keyed by bar signature
+# ============================================================
+
+from __future__ import annotations
+
+import contextlib
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from pandas import DataFrame
+
+# ---- constants ----
+MAX_ENTRIES = 128
+
+_CACHE: OrderedDict[Hashable, tuple[float, ...]] = OrderedDict()
+
+
+def bars_signature(symbol: str, timeframe: str, bars: DataFrame) -> tuple[Any, ...]:
+    """
+    Hashable identity of a bar frame: (symbol, timeframe, len, last bar time ns, last
+    close, last high, last low). A new bar or a new tick on the forming bar yields a
+    new signature (a tick that only stretches the range still moves ATR), so cached
+    entries invalidate naturally. High/low are None when the frame lacks them (a NaN
+    would never compare equal, so the key could not hit).
+    """
+    last = bars["time"].iloc[-1] if "time" in bars.columns else bars.index[-1]
+    last_ns = int(last.value) if hasattr(last, "value") else int(last)
+    high = float(bars["high"].iloc[-1]) if "high" in bars.columns else None
+    low = float(bars["low"].iloc[-1]) if "low" in bars.columns else None
+    return (symbol, timeframe, len(bars), last_ns, float(bars["close"].iloc[-1]), high, low)
+
+
+def cached_indicators(key: Hashable, compute: Callable[[], tuple[float, ...]]) -> tuple[float, ...]:
+    """
+    Return the cached indicator tuple for `key`, computing and storing it on a miss.
+    Bounded LRU: the least recently used entry is dropped past MAX_ENTRIES.
+    The cache is shared by all strategies, so start `key` with a namespace string
+    (e.g. "macd") to keep their differently shaped tuples apart.
+    """
+    hit = _CACHE.get(key)
+    if hit is not None:
+        with contextlib.suppress(KeyError):
+            _CACHE.move_to_end(key)
+        return hit
+
+    values = compute()
+    _CACHE[key] = values
+    while len(_CACHE) > MAX_ENTRIES:
+        _CACHE.popitem(last=False)
+    return values
+
+
+def clear_indicator_cache() -> None:
+    """Drop every cached entry (e.g. after changing strategy parameters)."""
+    _CACHE.clear()
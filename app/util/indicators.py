@@ -1,20 +1,171 @@
 # app/util/indicators.py
 
+import os
 
 import numpy as np
 
+from app.util._njit import njit, prange
+
 # -----------------------------
 # Constants
 # -----------------------------
 EPSILON = 1e-12  # to avoid divide-by-zero
 
+# Storage dtype for price inputs and series outputs. FP32 halves memory traffic;
+# kernels still accumulate in float64, so Wilder smoothing does not drift.
+INDICATOR_DTYPE = (
+    np.float32 if os.getenv("INDICATOR_FP32", "false").lower() == "true" else np.float64
+)
+
+
+# -----------------------------
+# Scalar kernels (last value only, no intermediate arrays)
+# -----------------------------
+# Not shared with app.util.ta on purpose: ta seeds the EMA at x[0] (pandas
+# adjust=False) and uses rs=0 when there are no losses, while these seed with the
+# SMA / mean deltas and add EPSILON. Swapping kernels would move every signal.
+@njit(cache=True)
+def _ema_last(x: np.ndarray, n: int) -> float:
+    """EMA seeded with the SMA of the first `n` values; returns the final value."""
+    ema = 0.0
+    for i in range(n):
+        ema += x[i]
+    ema /= n
+    k = 2.0 / (n + 1.0)
+    for i in range(n, x.shape[0]):
+        ema += (x[i] - ema) * k
+    return ema
+
+
+@njit(cache=True)
+def _ema_series(x: np.ndarray, n: int) -> np.ndarray:
+    """Same recurrence as `_ema_last`, keeping every value (NaN before the seed)."""
+    out = np.empty_like(x)
+    out[: n - 1] = np.nan
+    ema = 0.0
+    for i in range(n):
+        ema += x[i]
+    ema /= n
+    out[n - 1] = ema
+    k = 2.0 / (n + 1.0)
+    for i in range(n, x.shape[0]):
+        ema += (x[i] - ema) * k
+        out[i] = ema
+    return out
+
+
+@njit(cache=True)
+def _rsi_last(x: np.ndarray, p: int) -> float:
+    """Wilder RSI seeded with the mean gain/loss of the first `p` deltas."""
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, p + 1):
+        d = x[i] - x[i - 1]
+        if d > 0.0:
+            avg_gain += d
+        else:
+            avg_loss -= d
+    avg_gain /= p
+    avg_loss /= p
+
+    for i in range(p + 1, x.shape[0]):
+        d = x[i] - x[i - 1]
+        gain = d if d > 0.0 else 0.0
+        loss = -d if d < 0.0 else 0.0
+        avg_gain = (avg_gain * (p - 1) + gain) / p
+        avg_loss = (avg_loss * (p - 1) + loss) / p
+
+    rs = avg_gain / (avg_loss + EPSILON)
+    return 100.0 - (100.0 / (1.0 + rs))
+
 
-def compute_ema(prices: list[float], period: int) -> float:
+@njit(cache=True)
+def _ema_step(ema: float, xi: float, i: int, n: int, k: float) -> float:
+    """One `_ema_last` step at bar `i`: accumulate the SMA seed, then smooth."""
+    if i < n:
+        ema += xi
+        if i == n - 1:
+            ema /= n
+    else:
+        ema += (xi - ema) * k
+    return ema
+
+
+@njit(cache=True)
+def _rsi_step(avg_gain: float, avg_loss: float, d: float, i: int, p: int) -> tuple[float, float]:
+    """One `_rsi_last` step for delta `d` ending at bar `i` (i >= 1)."""
+    if i <= p:
+        if d > 0.0:
+            avg_gain += d
+        else:
+            avg_loss -= d
+        if i == p:
+            avg_gain /= p
+            avg_loss /= p
+    else:
+        gain = d if d > 0.0 else 0.0
+        loss = -d if d < 0.0 else 0.0
+        avg_gain = (avg_gain * (p - 1) + gain) / p
+        avg_loss = (avg_loss * (p - 1) + loss) / p
+    return avg_gain, avg_loss
+
+
+@njit(cache=True)
+def _emas_rsi_last(x: np.ndarray, nf: int, ns: int, rp: int) -> tuple[float, ...]:
+    """
+    Fused single pass: EMA fast/slow (SMA seed) and Wilder RSI, plus both EMAs as
+    of two bars back. Each recurrence matches `_ema_last` / `_rsi_last` exactly.
+    """
+    t = x.shape[0]
+    kf = 2.0 / (nf + 1.0)
+    ks = 2.0 / (ns + 1.0)
+    ef = 0.0
+    es = 0.0
+    avg_gain = 0.0
+    avg_loss = 0.0
+    ef_lag2 = np.nan
+    es_lag2 = np.nan
+    for i in range(t):
+        xi = x[i]
+        ef = _ema_step(ef, xi, i, nf, kf)
+        es = _ema_step(es, xi, i, ns, ks)
+        if i >= 1:
+            avg_gain, avg_loss = _rsi_step(avg_gain, avg_loss, xi - x[i - 1], i, rp)
+
+        if i == t - 3:
+            if i >= nf - 1:
+                ef_lag2 = ef
+            if i >= ns - 1:
+                es_lag2 = es
+
+    rs = avg_gain / (avg_loss + EPSILON)
+    rsi = 100.0 - (100.0 / (1.0 + rs))
+    return ef, es, rsi, ef_lag2, es_lag2
+
+
+@njit(cache=True, parallel=True)
+def _ema_rsi_batch(
+    close_mat: np.ndarray, ema_fast_n: int, ema_slow_n: int, rsi_p: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Row-parallel last EMA fast/slow and RSI over an (N symbols, T bars) matrix."""
+    n = close_mat.shape[0]
+    ema_fast = np.empty(n)
+    ema_slow = np.empty(n)
+    rsi = np.empty(n)
+    for r in prange(n):
+        row = close_mat[r]
+        ema_fast[r] = _ema_last(row, ema_fast_n)
+        ema_slow[r] = _ema_last(row, ema_slow_n)
+        rsi[r] = _rsi_last(row, rsi_p)
+    return ema_fast, ema_slow, rsi
+
+
+def compute_ema(prices: list[float] | np.ndarray, period: int) -> float:
     """
     Compute Exponential Moving Average (EMA).
 
     Args:
-        prices: list of price values (latest at the end).
+        prices: price values as list or float64 ndarray (latest at the end).
         period: EMA period.
 
     Returns:
@@ -23,25 +174,32 @@ def compute_ema(prices: list[float], period: int) -> float:
     if len(prices) < period:
         return float("nan")
 
-    # smoothing factor
-    k = 2 / (period + 1)
+    return float(_ema_last(np.asarray(prices, dtype=INDICATOR_DTYPE), period))
 
-    # start with simple average of first 'period' prices
-    ema = float(np.mean(prices[:period]))
 
-    # iterate through remaining prices
-    for price in prices[period:]:
-        ema = (price - ema) * k + ema
+def compute_ema_series(prices: list[float] | np.ndarray, period: int) -> np.ndarray:
+    """
+    Compute the full EMA series (same seeding as `compute_ema`).
 
-    return float(ema)
+    Args:
+        prices: price values as list or float64 ndarray (latest at the end).
+        period: EMA period.
 
+    Returns:
+        np.ndarray: EMA aligned with `prices` (INDICATOR_DTYPE); NaN until the first full window.
+    """
+    if len(prices) < period:
+        return np.full(len(prices), np.nan, dtype=INDICATOR_DTYPE)
 
-def compute_rsi(prices: list[float], period: int = 14) -> float:
+    return _ema_series(np.asarray(prices, dtype=INDICATOR_DTYPE), period)
+
+
+def compute_rsi(prices: list[float] | np.ndarray, period: int = 14) -> float:
     """
     Compute Relative Strength Index (RSI) using Wilder's smoothing.
 
     Args:
-        prices: list of price values (latest at the end).
+        prices: price values as list or float64 ndarray (latest at the end).
         period: lookback period (default 14).
 
     Returns:
@@ -50,20 +208,58 @@ def compute_rsi(prices: list[float], period: int = 14) -> float:
     if len(prices) < period + 1:
         return float("nan")
 
-    deltas = np.diff(prices)
-    gains = np.where(deltas > 0, deltas, 0.0)
-    losses = np.where(deltas < 0, -deltas, 0.0)
+    return float(_rsi_last(np.asarray(prices, dtype=INDICATOR_DTYPE), period))
 
-    # initial average gain/loss
-    avg_gain = np.mean(gains[:period])
-    avg_loss = np.mean(losses[:period])
 
-    # Wilder’s smoothing
-    for i in range(period, len(deltas)):
-        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+def compute_emas_rsi(
+    prices: list[float] | np.ndarray, ema_fast: int, ema_slow: int, rsi_period: int = 14
+) -> tuple[float, float, float, float, float]:
+    """
+    Compute last EMA fast/slow and RSI in a single pass over `prices`.
 
-    rs = avg_gain / (avg_loss + EPSILON)
-    rsi = 100.0 - (100.0 / (1.0 + rs))
+    Args:
+        prices: price values as list or float64 ndarray (latest at the end).
+        ema_fast: fast EMA period.
+        ema_slow: slow EMA period.
+        rsi_period: RSI lookback period (default 14).
+
+    Returns:
+        tuple: (ema_fast, ema_slow, rsi, slope_fast, slope_slow); the slopes are the
+        EMA change over the last 2 bars. Same values as `compute_ema`/`compute_rsi`;
+        all NaN when there are too few prices.
+    """
+    if len(prices) < max(ema_fast, ema_slow, rsi_period + 1):
+        nan = float("nan")
+        return nan, nan, nan, nan, nan
+
+    ef, es, rsi, ef_lag2, es_lag2 = _emas_rsi_last(
+        np.asarray(prices, dtype=INDICATOR_DTYPE), ema_fast, ema_slow, rsi_period
+    )
+    return float(ef), float(es), float(rsi), float(ef - ef_lag2), float(es - es_lag2)
+
+
+def compute_ema_rsi_batch(
+    close_mat: np.ndarray, ema_fast: int, ema_slow: int, rsi_period: int = 14
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute last-bar EMA fast/slow and RSI for many symbols in one pass.
+
+    Args:
+        close_mat: (N, T) closes, one aligned row per symbol (latest at the end).
+        ema_fast: fast EMA period.
+        ema_slow: slow EMA period.
+        rsi_period: RSI lookback period (default 14).
+
+    Returns:
+        tuple: (ema_fast, ema_slow, rsi) arrays of length N; NaN when T is too short.
+    """
+    mat = np.ascontiguousarray(close_mat, dtype=INDICATOR_DTYPE)
+    try:
+        n_rows, n_bars = mat.shape
+    except ValueError:
+        raise ValueError(f"close_mat must be 2-D, got shape {mat.shape}") from None
+    if n_bars < max(ema_fast, ema_slow, rsi_period + 1):
+        nan = np.full(n_rows, np.nan)
+        return nan, nan.copy(), nan.copy()
 
-    return float(rsi)
+    return _ema_rsi_batch(mat, ema_fast, ema_slow, rsi_period)
@@ -3,24 +3,87 @@
 # Agentic Trader - MT5 OHLCV Fetch Utility (timeframe-safe)
 # ============================================================
 
+import logging
 import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
 from typing import Any
 
 import MetaTrader5 as _mt5
+import numpy as np
 import pandas as pd
 
+from app.util.envparse import parse_int
+
+try:
+    import pyarrow  # noqa: F401  # pandas' feather engine
+
+    HAS_PYARROW = True
+except ImportError:  # pragma: no cover - depends on the install
+    HAS_PYARROW = False
+
 mt5: Any = _mt5  # cast to Any to silence type warnings
+logger = logging.getLogger(__name__)
+
+_RENAME = {"tick_volume": "volume"}
+
+# Identical bar requests within this many seconds share one MT5 fetch. Raise it
+# (e.g. to the runner cadence) with MT5_BARS_TTL_SEC; it is capped at half a bar.
+COALESCE_SEC = 2
+BARS_TTL_SEC = parse_int(os.getenv("MT5_BARS_TTL_SEC"), COALESCE_SEC)  # malformed -> default
+MAX_CACHED_FRAMES = 256
+# Optional restart-persistent copy of the same buckets (feather files); off when unset.
+# Files are keyed on the memory-cache bucket, so a restart only finds its file while
+# still inside that bucket: useful with MT5_BARS_TTL_SEC raised (e.g. to the runner
+# cadence), practically a no-op at the 2s default.
+BARS_CACHE_DIR = os.getenv("MT5_BARS_CACHE_DIR", "")
+if BARS_CACHE_DIR and BARS_TTL_SEC <= COALESCE_SEC:
+    logger.warning(
+        "MT5_BARS_CACHE_DIR is set but MT5_BARS_TTL_SEC=%ss; cached files expire before "
+        "a restart can reuse them. Raise MT5_BARS_TTL_SEC to make the disk cache useful.",
+        BARS_TTL_SEC,
+    )
 
 
 # ============================================================
 # Internal: Normalize timeframe strings
 # ============================================================
-def _resolve_timeframe(tf_in: str):
+_TF_MAP: dict[str, int] = {
+    "M1": mt5.TIMEFRAME_M1,
+    "M5": mt5.TIMEFRAME_M5,
+    "M15": mt5.TIMEFRAME_M15,
+    "M30": mt5.TIMEFRAME_M30,
+    "H1": mt5.TIMEFRAME_H1,
+    "H4": mt5.TIMEFRAME_H4,
+    "D1": mt5.TIMEFRAME_D1,
+    "W1": mt5.TIMEFRAME_W1,
+    "MN1": mt5.TIMEFRAME_MN1,
+}
+
+_TF_SECONDS: dict[int, int] = {
+    mt5.TIMEFRAME_M1: 60,
+    mt5.TIMEFRAME_M5: 300,
+    mt5.TIMEFRAME_M15: 900,
+    mt5.TIMEFRAME_M30: 1800,
+    mt5.TIMEFRAME_H1: 3600,
+    mt5.TIMEFRAME_H4: 14400,
+    mt5.TIMEFRAME_D1: 86400,
+    mt5.TIMEFRAME_W1: 604800,
+    mt5.TIMEFRAME_MN1: 2592000,
+}
+
+
+@lru_cache(maxsize=128)
+def _resolve_timeframe(tf_in: str) -> int | None:
     """
     Accepts '15m'/'M15', '1h'/'H1', '1d'/'D1', etc. and returns
-    the corresponding MT5 timeframe constant.
+    the corresponding MT5 timeframe constant (memoized per raw input).
     """
     s = str(tf_in).strip().upper()
+    if s in _TF_MAP:
+        return _TF_MAP[s]
 
     # Normalize numeric-first forms: '15M' -> 'M15', '1H' -> 'H1', etc.
     if s.endswith("M") and s[:-1].isdigit():
@@ -34,19 +97,41 @@ def _resolve_timeframe(tf_in: str):
     elif s.endswith("MN") and s[:-2].isdigit():  # '1MN'
         s = "MN" + s[:-2]
 
-    mapping = {
-        "M1": mt5.TIMEFRAME_M1,
-        "M5": mt5.TIMEFRAME_M5,
-        "M15": mt5.TIMEFRAME_M15,
-        "M30": mt5.TIMEFRAME_M30,
-        "H1": mt5.TIMEFRAME_H1,
-        "H4": mt5.TIMEFRAME_H4,
-        "D1": mt5.TIMEFRAME_D1,
-        "W1": mt5.TIMEFRAME_W1,
-        "MN1": mt5.TIMEFRAME_MN1,
-    }
+    return _TF_MAP.get(s)
+
+
+# ============================================================
+# MT5 session (initialize / symbol_select once per process)
+# ============================================================
+_session: dict[str, bool] = {"initialized": False}
+_selected: set[str] = set()
+
 
-    return mapping.get(s)
+def _ensure_session(symbol: str) -> bool:
+    """Initialize MT5 and select `symbol` unless already done in this session."""
+    if not _session["initialized"]:
+        mt5_path = os.getenv("MT5_PATH", r"C:\Program Files\MetaTrader 5\terminal64.exe")
+        if not mt5.initialize(mt5_path):
+            logger.warning("MT5 not initialized, retrying ...")
+            if not mt5.initialize():
+                logger.error("MT5 initialization failed: %s", mt5.last_error())
+                return False
+        _session["initialized"] = True
+
+    if symbol not in _selected:
+        # Ensure symbol is visible and subscribed
+        if not mt5.symbol_select(symbol, True):
+            logger.warning("Failed to select symbol %s", symbol)
+            return False
+        _selected.add(symbol)
+
+    return True
+
+
+def reset_mt5_session() -> None:
+    """Forget the MT5 session so the next fetch re-initializes and re-selects symbols."""
+    _session["initialized"] = False
+    _selected.clear()
 
 
 # ============================================================
@@ -57,49 +142,149 @@ def get_bars(symbol: str, timeframe: str, count: int = 300) -> pd.DataFrame | No
     Fetch OHLCV bars from MetaTrader 5 and return as DataFrame.
     Handles both normalized timeframes and reinitializes if needed.
     """
-    mt5_path = os.getenv("MT5_PATH", r"C:\Program Files\MetaTrader 5\terminal64.exe")
-
-    if not mt5.initialize(mt5_path):
-        print("[WARN] MT5 not initialized, retrying ...")
-        if not mt5.initialize():
-            print("[ERROR] MT5 initialization failed:", mt5.last_error())
-            return None
-
-    # Ensure symbol is visible and subscribed
-    if not mt5.symbol_select(symbol, True):
-        print(f"[WARN] Failed to select symbol {symbol}")
+    if not _ensure_session(symbol):
         return None
 
     tf = _resolve_timeframe(timeframe)
     if tf is None:
-        print(f"[ERROR] Invalid timeframe '{timeframe}'")
+        logger.error("Invalid timeframe '%s'", timeframe)
         return None
 
     rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
+    if rates is None:
+        # lost terminal connection or deselected symbol: start over on the next call
+        reset_mt5_session()
     if rates is None or len(rates) == 0:
-        print(f"[WARN] No rates fetched for {symbol} ({timeframe})")
+        logger.warning("No rates fetched for %s (%s)", symbol, timeframe)
         return None
 
-    df = pd.DataFrame(rates)
-    df["time"] = pd.to_datetime(df["time"], unit="s", utc=True)
-    df.rename(columns={"tick_volume": "volume"}, inplace=True)
+    # Structured (AoS) record array -> one typed column per field (SoA)
+    cols = {_RENAME.get(name, name): rates[name] for name in rates.dtype.names}
+    cols["time"] = pd.to_datetime(cols["time"], unit="s", utc=True)
+    df = pd.DataFrame(cols, copy=False)
+
+    logger.debug("Refreshed %d bars for %s (%s)", len(df), symbol, timeframe)
+    return df
+
+
+# ============================================================
+# Cached fetch (one MT5 round-trip per request per time bucket)
+# ============================================================
+# (symbol, timeframe, count) -> (bucket, frame)
+_BAR_CACHE: OrderedDict[tuple[str, str, int], tuple[int, pd.DataFrame]] = OrderedDict()
+
+
+@lru_cache(maxsize=64)
+def _bucket_seconds(timeframe: str) -> int:
+    """Cache bucket length for `timeframe`: BARS_TTL_SEC, at most half a bar."""
+    bar_sec = _TF_SECONDS.get(_resolve_timeframe(timeframe), 60)
+    return max(1, min(BARS_TTL_SEC, bar_sec // 2))
+
+
+def get_bars_cached(symbol: str, timeframe: str, count: int = 300) -> pd.DataFrame | None:
+    """
+    Same as `get_bars`, but repeat requests for the same symbol/timeframe/count within
+    one time bucket share a single fetch. The DataFrame is shared: treat it as
+    read-only. Failed fetches are not cached.
+    """
+    key = (symbol, timeframe, count)
+    bucket = int(time.time()) // _bucket_seconds(timeframe)
+    hit = _BAR_CACHE.get(key)
+    if hit is not None and hit[0] == bucket:
+        _BAR_CACHE.move_to_end(key)
+        return hit[1]
 
-    print(f"[DEBUG] Refreshed {len(df)} bars for {symbol} ({timeframe})")
+    df = _disk_load(key, bucket)
+    if df is None:
+        df = get_bars(symbol, timeframe, count)
+        if df is None:
+            _BAR_CACHE.pop(key, None)
+            return None
+        _disk_store(key, bucket, df)
+    _BAR_CACHE[key] = (bucket, df)
+    _BAR_CACHE.move_to_end(key)
+    while len(_BAR_CACHE) > MAX_CACHED_FRAMES:
+        _BAR_CACHE.popitem(last=False)
     return df
 
 
+def invalidate(symbol: str | None = None) -> None:
+    """Drop cached frames for `symbol` (all symbols if None), e.g. after an order fill."""
+    if _disk_enabled():
+        pattern = f"{symbol}_*.feather" if symbol is not None else "*.feather"
+        for path in Path(BARS_CACHE_DIR).glob(pattern):
+            path.unlink(missing_ok=True)
+    if symbol is None:
+        _BAR_CACHE.clear()
+        return
+    for key in [k for k in _BAR_CACHE if k[0] == symbol]:
+        del _BAR_CACHE[key]
+
+
+# ---- disk layer: survives runner restarts within the same bucket ----
+def _disk_enabled() -> bool:
+    return bool(BARS_CACHE_DIR) and HAS_PYARROW
+
+
+def _disk_path(key: tuple[str, str, int], bucket: int) -> Path:
+    symbol, timeframe, count = key
+    return Path(BARS_CACHE_DIR) / f"{symbol}_{timeframe}_{count}_{bucket}.feather"
+
+
+def _disk_load(key: tuple[str, str, int], bucket: int) -> pd.DataFrame | None:
+    """Frame stored for exactly this bucket, or None (disabled, missing or unreadable)."""
+    if not _disk_enabled():
+        return None
+    path = _disk_path(key, bucket)
+    if not path.exists():
+        return None
+    try:
+        return pd.read_feather(path)
+    except Exception as e:
+        logger.warning("Ignoring unreadable bar cache %s: %s", path, e)
+        return None
+
+
+def _disk_store(key: tuple[str, str, int], bucket: int, df: pd.DataFrame) -> None:
+    """Write the frame for `bucket` and drop older buckets of the same request."""
+    if not _disk_enabled():
+        return
+    path = _disk_path(key, bucket)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        df.to_feather(tmp)
+        os.replace(tmp, path)  # readers never see a half-written file
+        symbol, timeframe, count = key
+        for old in path.parent.glob(f"{symbol}_{timeframe}_{count}_*.feather"):
+            if old != path:
+                old.unlink(missing_ok=True)
+    except Exception as e:
+        logger.warning("Bar cache write failed for %s: %s", path, e)
+
+
 # ============================================================
-# Helper to extract closes
+# Helpers to extract price columns
 # ============================================================
-def get_closes(rates: Any) -> list[float]:
-    """Normalize MT5 rates into a list of closing prices."""
+def as_f64(col: pd.Series) -> np.ndarray:
+    """Column as a float64 ndarray; zero-copy when it already is float64 (MT5 bars)."""
+    if col.dtype == np.float64:
+        return col.to_numpy(copy=False)
+    return col.to_numpy(dtype=np.float64)
+
+
+def get_closes(rates: Any) -> np.ndarray:
+    """Normalize MT5 rates into a float64 array of closing prices."""
     if rates is None:
-        return []
+        return np.empty(0, dtype=np.float64)
 
     if isinstance(rates, pd.DataFrame):
-        return rates["close"].tolist()
+        return as_f64(rates["close"])
+
+    if isinstance(rates, np.ndarray) and rates.dtype.names and "close" in rates.dtype.names:
+        return rates["close"].astype(np.float64, copy=False)
 
     try:
-        return [r.close for r in rates]
+        return np.fromiter((r.close for r in rates), dtype=np.float64)
     except Exception:
-        return []
+        return np.empty(0, dtype=np.float64)
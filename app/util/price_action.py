@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from typing import Literal, TypedDict, Optional
+import numpy as np
 import pandas as pd
 
 Side = Literal["BULLISH", "BEARISH"]
@@ -16,63 +17,65 @@ class FVG(TypedDict):
     mid: float
 
 
-def find_fvgs(df: pd.DataFrame, lookback: int = 100) -> list[FVG]:
+def _fvg_masks(
+    df: pd.DataFrame, lookback: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]:
     """
-    Detect simple 3-candle FVGs using:
-      - Bullish: C.low > A.high  -> gap [A.high, C.low]
-      - Bearish: C.high < A.low  -> gap [C.high, A.low]
-    Expects columns: 'high', 'low'. Returns most-recent last.
+    Bullish/bearish masks over the 3-candle windows ending in the last `lookback` bars.
+    Element j is the window with A = start - 2 + j and C = A + 2 (all slices are views).
     """
     highs = df["high"].to_numpy()
     lows = df["low"].to_numpy()
     n = len(df)
     start = max(2, n - lookback)
-    out: list[FVG] = []
+    if start >= n:  # no complete A..C window in range
+        empty = np.zeros(0, dtype=bool)
+        return empty, empty, highs, lows, start
 
-    for i in range(start, n):
-        a = i - 2
-        b = i - 1  # unused but shows classic A,B,C indexing
-        c = i
-        if a < 0:
-            continue
+    a_high, a_low = highs[start - 2 : n - 2], lows[start - 2 : n - 2]
+    c_high, c_low = highs[start:], lows[start:]
+    bull = c_low > a_high
+    bear = c_high < a_low
+    return bull, bear, highs, lows, start
 
-        # Bullish FVG
-        if lows[c] > highs[a]:
-            low, high = float(highs[a]), float(lows[c])
-            out.append({
-                "side": "BULLISH",
-                "start_idx": a,
-                "end_idx": c,
-                "low": low,
-                "high": high,
-                "mid": (low + high) / 2.0,
-            })
 
-        # Bearish FVG
-        if highs[c] < lows[a]:
-            low, high = float(highs[c]), float(lows[a])
-            out.append({
-                "side": "BEARISH",
-                "start_idx": a,
-                "end_idx": c,
-                "low": low,
-                "high": high,
-                "mid": (low + high) / 2.0,
-            })
+def _make_fvg(bullish: bool, a: int, highs: np.ndarray, lows: np.ndarray) -> FVG:
+    c = a + 2
+    if bullish:
+        low, high = float(highs[a]), float(lows[c])
+    else:
+        low, high = float(highs[c]), float(lows[a])
+    return {
+        "side": "BULLISH" if bullish else "BEARISH",
+        "start_idx": a,
+        "end_idx": c,
+        "low": low,
+        "high": high,
+        "mid": (low + high) / 2.0,
+    }
 
-    return out
+
+def find_fvgs(df: pd.DataFrame, lookback: int = 100) -> list[FVG]:
+    """
+    Detect simple 3-candle FVGs using:
+      - Bullish: C.low > A.high  -> gap [A.high, C.low]
+      - Bearish: C.high < A.low  -> gap [C.high, A.low]
+    Expects columns: 'high', 'low'. Returns most-recent last.
+    """
+    bull, bear, highs, lows, start = _fvg_masks(df, lookback)
+    # the two conditions are mutually exclusive, so one index pass keeps bar order
+    return [
+        _make_fvg(bool(bull[j]), start - 2 + int(j), highs, lows)
+        for j in np.flatnonzero(bull | bear)
+    ]
 
 
 def latest_same_side_fvg(
     df: pd.DataFrame, side: TradeSide, lookback: int = 100
 ) -> Optional[FVG]:
-    fvgs = find_fvgs(df, lookback)
-    if side == "LONG":
-        for z in reversed(fvgs):
-            if z["side"] == "BULLISH":
-                return z
-    else:
-        for z in reversed(fvgs):
-            if z["side"] == "BEARISH":
-                return z
-    return None
+    bull, bear, highs, lows, start = _fvg_masks(df, lookback)
+    mask = bull if side == "LONG" else bear
+    if not mask.any():
+        return None
+    j = mask.size - 1 - int(np.argmax(mask[::-1]))
+    return _make_fvg(side == "LONG", start - 2 + j, highs, lows)
@@ -2,7 +2,167 @@
 from __future__ import annotations
 
 import numpy as np
-import pandas as pd
+
+from app.util._njit import HAS_NUMBA, njit
+
+try:
+    from scipy.signal import lfilter
+
+    HAS_SCIPY = True
+except ImportError:  # pragma: no cover - depends on the install
+    HAS_SCIPY = False
+
+
+@njit(cache=True)
+def _ema_kernel(arr: np.ndarray, period: int) -> np.ndarray:
+    """EMA recurrence seeded at arr[0] (pandas ewm(span=period, adjust=False))."""
+    alpha = 2.0 / (period + 1.0)
+    beta = 1.0 - alpha
+    out = np.empty(arr.size)
+    out[0] = arr[0]
+    for i in range(1, arr.size):
+        out[i] = arr[i] * alpha + out[i - 1] * beta
+    return out
+
+
+def _ema_lfilter(arr: np.ndarray, period: int) -> np.ndarray:
+    """Loop-free `_ema_kernel` for installs without numba (same IIR via scipy)."""
+    alpha = 2.0 / (period + 1.0)
+    beta = 1.0 - alpha
+    out = np.empty(arr.size)
+    out[0] = arr[0]
+    out[1:] = lfilter([alpha], [1.0, -beta], arr[1:], zi=[arr[0] * beta])[0]
+    return out
+
+
+def _ema_last_lfilter(arr: np.ndarray, period: int) -> float:
+    return float(_ema_lfilter(arr, period)[-1])
+
+
+def _rsi_last_lfilter(deltas: np.ndarray, period: int, up: float, down: float) -> float:
+    if deltas.size == period:
+        return _rsi_last_kernel(deltas, period, up, down)  # seed only, no recurrence
+    out = np.empty(deltas.size + 1)
+    _rsi_wilder_lfilter(deltas, period, up, down, out)
+    return float(out[-1])
+
+
+@njit(cache=True)
+def _rsi_wilder(deltas: np.ndarray, period: int, up: float, down: float, out: np.ndarray) -> None:
+    """Wilder smoothing from the seed averages; writes RSI into out[period + 1:]."""
+    up_val, down_val = up, down
+    for i in range(period, deltas.size):
+        delta = deltas[i]
+        up_val = (up_val * (period - 1) + max(delta, 0.0)) / period
+        down_val = (down_val * (period - 1) + max(-delta, 0.0)) / period
+        rs = up_val / down_val if down_val != 0 else 0.0
+        out[i + 1] = 100.0 - 100.0 / (1.0 + rs)
+
+
+def _rsi_wilder_lfilter(
+    deltas: np.ndarray, period: int, up: float, down: float, out: np.ndarray
+) -> None:
+    """
+    Loop-free `_rsi_wilder` for installs without numba: Wilder smoothing is the
+    first-order IIR y[i] = x[i] / p + (p - 1) / p * y[i - 1], started from the seeds.
+    """
+    b = [1.0 / period]
+    a = [1.0, -(period - 1) / period]
+    tail = deltas[period:]
+    up_vals = lfilter(b, a, np.maximum(tail, 0.0), zi=[up * (period - 1) / period])[0]
+    down_vals = lfilter(b, a, np.maximum(-tail, 0.0), zi=[down * (period - 1) / period])[0]
+    rs = np.divide(up_vals, down_vals, out=np.zeros_like(up_vals), where=down_vals != 0)
+    out[period + 1 :] = 100.0 - 100.0 / (1.0 + rs)
+
+
+@njit(cache=True)
+def _atr_kernel(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int) -> np.ndarray:
+    """True range and Wilder ATR in one pass; needs closes.size >= period + 1."""
+    n = closes.size
+    trs = np.empty(n)
+    atr_out = np.full(n, np.nan)
+    seed = 0.0
+    for i in range(1, n):
+        hl = highs[i] - lows[i]
+        hc = abs(highs[i] - closes[i - 1])
+        lc = abs(lows[i] - closes[i - 1])
+        tr = max(hl, hc, lc)
+        trs[i] = tr
+        if i <= period:
+            seed += tr
+    atr_out[period] = seed / period
+    for i in range(period + 1, n):
+        atr_out[i] = (atr_out[i - 1] * (period - 1) + trs[i]) / period
+    return atr_out
+
+
+# ---- last-value kernels: same recurrences, no output array ----
+@njit(cache=True)
+def _ema_last_kernel(arr: np.ndarray, period: int) -> float:
+    """Final value of `_ema_kernel`."""
+    alpha = 2.0 / (period + 1.0)
+    beta = 1.0 - alpha
+    val = arr[0]
+    for i in range(1, arr.size):
+        val = arr[i] * alpha + val * beta
+    return val
+
+
+@njit(cache=True)
+def _rsi_last_kernel(deltas: np.ndarray, period: int, up: float, down: float) -> float:
+    """Final value written by `_rsi_wilder` (or the seed RSI when there is no tail)."""
+    up_val, down_val = up, down
+    for i in range(period, deltas.size):
+        delta = deltas[i]
+        up_val = (up_val * (period - 1) + max(delta, 0.0)) / period
+        down_val = (down_val * (period - 1) + max(-delta, 0.0)) / period
+    rs = up_val / down_val if down_val != 0 else 0.0
+    return 100.0 - 100.0 / (1.0 + rs)
+
+
+@njit(cache=True)
+def _atr_last_kernel(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int) -> float:
+    """Final value of `_atr_kernel`."""
+    val = 0.0
+    for i in range(1, closes.size):
+        hl = highs[i] - lows[i]
+        hc = abs(highs[i] - closes[i - 1])
+        lc = abs(lows[i] - closes[i - 1])
+        tr = max(hl, hc, lc)
+        if i < period:
+            val += tr
+        elif i == period:
+            val = (val + tr) / period
+        else:
+            val = (val * (period - 1) + tr) / period
+    return val
+
+
+# Prebuilt kernels from `python -m app.util._indicators_aot` need no JIT warm-up
+try:
+    from app.util.indicators_aot import atr_kernel as _atr_impl
+    from app.util.indicators_aot import atr_last as _atr_last_impl
+    from app.util.indicators_aot import ema_kernel as _ema_impl
+    from app.util.indicators_aot import ema_last as _ema_last_impl
+    from app.util.indicators_aot import rsi_last as _rsi_last_impl
+    from app.util.indicators_aot import rsi_wilder as _rsi_smooth
+
+    HAS_AOT = True
+except ImportError:
+    HAS_AOT = False
+    _atr_impl = _atr_kernel
+    _atr_last_impl = _atr_last_kernel
+    # numba kernels when compiled; otherwise the scipy filters beat the interpreted loops
+    if HAS_NUMBA or not HAS_SCIPY:
+        _ema_impl = _ema_kernel
+        _ema_last_impl = _ema_last_kernel
+        _rsi_smooth = _rsi_wilder
+        _rsi_last_impl = _rsi_last_kernel
+    else:
+        _ema_impl = _ema_lfilter
+        _ema_last_impl = _ema_last_lfilter
+        _rsi_smooth = _rsi_wilder_lfilter
+        _rsi_last_impl = _rsi_last_lfilter
 
 
 def ema(series: list[float] | np.ndarray, period: int) -> np.ndarray:
@@ -10,10 +170,16 @@ def ema(series: list[float] | np.ndarray, period: int) -> np.ndarray:
     Exponential Moving Average (EMA).
     Falls back to NaN array if not enough data.
     """
-    arr = np.asarray(series, dtype=float)
+    arr = np.ascontiguousarray(series, dtype=np.float64)
     if arr.size < period:
         return np.full_like(arr, np.nan, dtype=float)
-    return pd.Series(arr).ewm(span=period, adjust=False).mean().to_numpy(dtype=float)
+    return _ema_impl(arr, period)
+
+
+def _rsi_seed(deltas: np.ndarray, period: int) -> tuple[float, float]:
+    """Mean gain / mean loss over the first `period` deltas."""
+    seed = deltas[:period]
+    return float(seed[seed >= 0].sum() / period), float(-seed[seed < 0].sum() / period)
 
 
 def rsi(series: list[float] | np.ndarray, period: int = 14) -> np.ndarray:
@@ -27,22 +193,14 @@ def rsi(series: list[float] | np.ndarray, period: int = 14) -> np.ndarray:
         return np.full(n, np.nan, dtype=float)
 
     deltas = np.diff(arr)
-    seed = deltas[:period]
-    up = seed[seed >= 0].sum() / period
-    down = -seed[seed < 0].sum() / period
+    up, down = _rsi_seed(deltas, period)
     rs = up / down if down != 0 else 0.0
 
     out = np.zeros(n, dtype=float)
     out[:period] = np.nan
     out[period] = 100.0 - 100.0 / (1.0 + rs)
 
-    up_val, down_val = up, down
-    for i in range(period + 1, n):
-        delta = deltas[i - 1]
-        up_val = (up_val * (period - 1) + max(delta, 0.0)) / period
-        down_val = (down_val * (period - 1) + max(-delta, 0.0)) / period
-        rs = up_val / down_val if down_val != 0 else 0.0
-        out[i] = 100.0 - 100.0 / (1.0 + rs)
+    _rsi_smooth(deltas, period, up, down, out)
     return out
 
 
@@ -61,20 +219,62 @@ def atr(
     closes_arr = np.asarray(closes, dtype=float)
 
     n = closes_arr.size
+    if highs_arr.size != n or lows_arr.size != n:
+        raise ValueError(f"highs/lows/closes length mismatch: {highs_arr.size}/{lows_arr.size}/{n}")
     if n < period + 1:
         return np.full(n, np.nan, dtype=float)
 
-    trs = np.zeros(n, dtype=float)
-    trs[0] = np.nan
-    for i in range(1, n):
-        trs[i] = max(
-            highs_arr[i] - lows_arr[i],
-            abs(highs_arr[i] - closes_arr[i - 1]),
-            abs(lows_arr[i] - closes_arr[i - 1]),
-        )
-
-    atr_out = np.full(n, np.nan, dtype=float)
-    atr_out[period] = np.nanmean(trs[1 : period + 1])
-    for i in range(period + 1, n):
-        atr_out[i] = (atr_out[i - 1] * (period - 1) + trs[i]) / period
-    return atr_out
+    return _atr_impl(highs_arr, lows_arr, closes_arr, period)
+
+
+# ---- last value only (live decisions; the array versions serve plots/backtests) ----
+def ema_last(series: list[float] | np.ndarray, period: int) -> float:
+    """Last value of `ema` without building the series; NaN if not enough data."""
+    arr = np.ascontiguousarray(series, dtype=np.float64)
+    if arr.size < period or arr.size == 0:
+        return float("nan")
+    return float(_ema_last_impl(arr, period))
+
+
+def rsi_last(series: list[float] | np.ndarray, period: int = 14) -> float:
+    """Last value of `rsi` without building the series; NaN if not enough data."""
+    arr = np.asarray(series, dtype=float)
+    if arr.size < period + 1:
+        return float("nan")
+    deltas = np.diff(arr)
+    up, down = _rsi_seed(deltas, period)
+    return float(_rsi_last_impl(deltas, period, up, down))
+
+
+def atr_last(
+    highs: list[float] | np.ndarray,
+    lows: list[float] | np.ndarray,
+    closes: list[float] | np.ndarray,
+    period: int = 14,
+) -> float:
+    """Last value of `atr` without building the series; NaN if not enough data."""
+    highs_arr = np.asarray(highs, dtype=float)
+    lows_arr = np.asarray(lows, dtype=float)
+    closes_arr = np.asarray(closes, dtype=float)
+
+    n = closes_arr.size
+    if highs_arr.size != n or lows_arr.size != n:
+        raise ValueError(f"highs/lows/closes length mismatch: {highs_arr.size}/{lows_arr.size}/{n}")
+    if n < period + 1:
+        return float("nan")
+
+    return float(_atr_last_impl(highs_arr, lows_arr, closes_arr, period))
+
+
+def _warm_up() -> None:
+    """Compile (or load from the numba cache) the kernels at import, not on first use."""
+    _ema_kernel(np.zeros(2), 1)
+    _rsi_wilder(np.zeros(2), 1, 0.0, 0.0, np.zeros(3))
+    _atr_kernel(np.zeros(2), np.zeros(2), np.zeros(2), 1)
+    _ema_last_kernel(np.zeros(2), 1)
+    _rsi_last_kernel(np.zeros(2), 1, 0.0, 0.0)
+    _atr_last_kernel(np.zeros(2), np.zeros(2), np.zeros(2), 1)
+
+
+if HAS_NUMBA and not HAS_AOT:
+    _warm_up()
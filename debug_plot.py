@@ -4,22 +4,51 @@ from __future__ import annotations
 import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
 from app.market.data import get_rates  # uses your MT5 pipe
+from app.util._njit import njit
+from app.util.ta import ema as _ema_arr  # njit EMA, compiled/cached at import
 
 def ema(s: pd.Series, n: int) -> pd.Series:
-    return s.ewm(span=n, adjust=False).mean()
+    # same recurrence as s.ewm(span=n, adjust=False).mean(); NaN if len(s) < n
+    return pd.Series(_ema_arr(s.to_numpy(dtype=np.float64), n), index=s.index)
+
+@njit(cache=True)
+def _ewma_alpha(x: np.ndarray, alpha: float, out: np.ndarray, start: int) -> None:
+    # generic exponential smoother, in place: out[i] = out[i-1] + alpha*(x[i]-out[i-1])
+    # for i > start; out[start] holds the seed. Wilder's RSI is this with alpha=1/period
+    for i in range(start + 1, x.shape[0]):
+        out[i] = out[i - 1] + alpha * (x[i] - out[i - 1])
 
 def rsi(s: pd.Series, period: int = 14) -> pd.Series:
-    d = s.diff()
-    up = d.clip(lower=0.0)
-    dn = (-d).clip(lower=0.0)
-    # Wilder’s smoothing
-    roll_up = up.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    roll_dn = dn.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    rs = roll_up / (roll_dn.replace(0, np.nan))
-    return 100.0 - (100.0 / (1.0 + rs))
+    # Wilder’s smoothing, seeded with the mean gain/loss of the first `period` deltas;
+    # NaN before the seed and wherever there were no losses to divide by
+    x = s.to_numpy(dtype=np.float64)
+    out = np.full(x.shape[0], np.nan)
+    if x.shape[0] <= period:
+        return pd.Series(out, index=s.index)
+    delta = np.diff(x)
+    up = np.maximum(delta, 0.0)
+    down = np.maximum(-delta, 0.0)
+    ru = np.empty_like(delta)
+    rd = np.empty_like(delta)
+    ru[period - 1] = up[:period].sum() / period
+    rd[period - 1] = down[:period].sum() / period
+    _ewma_alpha(up, 1.0 / period, ru, period - 1)
+    _ewma_alpha(down, 1.0 / period, rd, period - 1)
+    ru, rd = ru[period - 1 :], rd[period - 1 :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[period:] = np.where(rd > 0, 100.0 - 100.0 / (1.0 + ru / rd), np.nan)
+    return pd.Series(out, index=s.index)
+
+def _pyplot(headless: bool):
+    # pyplot is imported lazily (after the data checks) so headless runs can pick Agg
+    # before any GUI backend loads
+    import matplotlib  # noqa: PLC0415
+    if headless:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt  # noqa: PLC0415
+    return plt
 
 def main():
     p = argparse.ArgumentParser(description="Quick visual check of bars + EMA + RSI")
@@ -28,6 +57,8 @@ def main():
     p.add_argument("--bars", type=int, default=300)
     p.add_argument("--tail", type=int, default=120, help="how many candles to show")
     p.add_argument("--save", action="store_true", help="save PNGs next to script")
+    p.add_argument("--no-show", action="store_true",
+                   help="don't open plot windows (headless; combine with --save)")
     args = p.parse_args()
 
     df = get_rates(args.symbol, args.tf, args.bars)
@@ -41,21 +72,29 @@ def main():
             print(f"[debug_plot] missing column: {col}")
             return
 
-    df = df.copy()
+    # get_rates builds a fresh frame per call, so the derived columns go on it directly
     df["ema50"] = ema(df["close"], 50)
     df["ema200"] = ema(df["close"], 200)
     df["rsi14"] = rsi(df["close"], 14)
 
+    plt = _pyplot(headless=args.no_show)
+
     # Focus on most recent N candles for readability
     plot = df.tail(args.tail)
 
     title_base = f"{args.symbol} {args.tf}  (len={len(df)})"
 
+    # convert the shared x axis and each series to ndarrays once; matplotlib would
+    # otherwise re-unpack the Series on every plot call
+    xs, close, ema50, ema200, rsi14 = (
+        plot[col].to_numpy() for col in ("time", "close", "ema50", "ema200", "rsi14")
+    )
+
     # ---- Figure 1: Price + EMA50/EMA200 ----
     plt.figure(figsize=(12, 6))
-    plt.plot(plot["time"], plot["close"], label="Close")
-    plt.plot(plot["time"], plot["ema50"], label="EMA50")
-    plt.plot(plot["time"], plot["ema200"], label="EMA200")
+    plt.plot(xs, close, label="Close")
+    plt.plot(xs, ema50, label="EMA50")
+    plt.plot(xs, ema200, label="EMA200")
     plt.title(f"{title_base} — Price & EMAs")
     plt.xlabel("Time")
     plt.ylabel("Price")
@@ -63,11 +102,12 @@ def main():
     plt.tight_layout()
     if args.save:
         plt.savefig(f"plot_{args.symbol}_{args.tf}_price.png", dpi=120)
-    plt.show()
+    if not args.no_show:
+        plt.show()
 
     # ---- Figure 2: RSI(14) ----
     plt.figure(figsize=(12, 3.5))
-    plt.plot(plot["time"], plot["rsi14"], label="RSI(14)")
+    plt.plot(xs, rsi14, label="RSI(14)")
     plt.axhline(70, linestyle="--")
     plt.axhline(50, linestyle="--")
     plt.axhline(30, linestyle="--")
@@ -77,7 +117,8 @@ def main():
     plt.tight_layout()
     if args.save:
         plt.savefig(f"plot_{args.symbol}_{args.tf}_rsi.png", dpi=120)
-    plt.show()
+    if not args.no_show:
+        plt.show()
 
     # Print the latest snapshot used by the bot
     last = df.iloc[-1]
@@ -2,40 +2,82 @@
 from __future__ import annotations
 
 import os
-from datetime import UTC, datetime, timedelta
+import time
 from typing import Any
 
+import numpy as np
 from app.brokers.mt5_client import get_account_info, get_positions
+from app.util.envparse import parse_float, parse_int
 
 
 def _env_int(name: str, default: int) -> int:
-    try:
-        return int(os.environ.get(name, str(default)).split("#", 1)[0].strip())
-    except:
+    raw = os.environ.get(name)
+    if raw is None:
         return default
+    return parse_int(raw, default)
 
 
 def _env_float(name: str, default: float) -> float:
-    try:
-        return float(os.environ.get(name, str(default)).split("#", 1)[0].strip())
-    except:
-        return default
+    raw = os.environ.get(name)
+    if raw is None:
+        return float(default)
+    return parse_float(raw, default)
+
+
+# side codes in the packed position arrays
+SIDE_BUY = 0
+SIDE_SELL = 1
+
+
+def _positions_to_soa(
+    positions: list[dict[str, Any]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pack broker positions into parallel arrays in one pass:
+    (sides uint8, times int64 as reported (ms or s), profits float64, symbols object).
+    Unparseable profits become NaN.
+    """
+    n = len(positions)
+    sides = np.empty(n, dtype=np.uint8)
+    times = np.empty(n, dtype=np.int64)
+    profits = np.empty(n, dtype=np.float64)
+    symbols = np.empty(n, dtype=object)
+    for i, p in enumerate(positions):
+        ps = str(p.get("side") or p.get("type"))
+        sides[i] = SIDE_BUY if ps.upper() == "BUY" or ps == "0" else SIDE_SELL
+        times[i] = int(p.get("time_msc") or p.get("time") or 0)
+        try:
+            profits[i] = float(p.get("profit", 0))
+        except Exception:
+            profits[i] = np.nan
+        symbols[i] = p.get("symbol")
+    return sides, times, profits, symbols
 
 
 def risk_guard(
-    symbol: str, side: str, sl_pips: float | None = None
+    symbol: str,
+    side: str,
+    sl_pips: float | None = None,
+    *,
+    positions: list[Any] | None = None,
+    account: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
     """
     Central guardrail logic. Returns dict with 'accepted': bool and 'note': str.
+
+    `positions` / `account` let a caller checking several symbols share one broker
+    snapshot per tick; when omitted they are fetched here.
     """
     # ---- exposure caps ----
     max_sym = _env_int("MAX_TRADES_PER_SYMBOL", 2)
     max_all = _env_int("MAX_OPEN_POSITIONS", 6)
 
-    pos_all = get_positions(None)
-    pos_sym = get_positions(symbol)
+    # one broker round-trip; the per-symbol view is a mask over the packed arrays
+    pos_all = get_positions(None) if positions is None else positions
+    sides, times, profits, symbols = _positions_to_soa(pos_all)
+    mask_sym = symbols == symbol
 
-    if len(pos_sym) >= max_sym:
+    if int(mask_sym.sum()) >= max_sym:
         return {
             "accepted": False,
             "note": f"{symbol} per-symbol cap reached ({max_sym})",
@@ -49,23 +91,16 @@ def risk_guard(
     )
     cool_min = _env_int("SAME_SIDE_COOLDOWN_MIN", _env_int("AGENT_COOLDOWN_MIN", 0))
     if block_same and side in ("LONG", "SHORT"):
-        want_buy = side == "LONG"
-        same_side_pos = []
-        for p in pos_sym:
-            ps = str(p.get("side") or p.get("type"))
-            is_buy = ps.upper() == "BUY" or ps == "0"
-            if is_buy == want_buy:
-                same_side_pos.append(p)
-        if same_side_pos:
+        want = SIDE_BUY if side == "LONG" else SIDE_SELL
+        # one masked reduction gives both "any same-side open" and the newest open
+        # time (-1 when none), without gathering the matching rows first
+        newest = int(times.max(where=mask_sym & (sides == want), initial=-1))
+        if newest >= 0:
             if cool_min <= 0:
                 return {"accepted": False, "note": f"{symbol} same-side open; skipping"}
-            newest = max(
-                (p.get("time_msc") or p.get("time") or 0) for p in same_side_pos
-            )
-            if newest > 10**12:
-                newest = newest / 1000.0
-            last_dt = datetime.fromtimestamp(float(newest), tz=UTC)
-            if datetime.now(UTC) - last_dt < timedelta(minutes=cool_min):
+            # broker times are epoch ms or s; compare in integer ms
+            newest_ms = newest if newest > 10**12 else newest * 1000
+            if time.time_ns() // 1_000_000 - newest_ms < cool_min * 60_000:
                 return {
                     "accepted": False,
                     "note": f"{symbol} same-side cooldown active",
@@ -73,9 +108,8 @@ def risk_guard(
 
     # ---- floating PnL guard ----
     min_symbol_pnl = _env_float("MIN_SYMBOL_FLOATING_PNL", -9999)
-    try:
-        floating = sum(float(p.get("profit", 0)) for p in pos_sym)
-    except Exception:
+    floating = float(profits[mask_sym].sum())
+    if np.isnan(floating):  # an unparseable profit voids the sum, as before
         floating = 0.0
     if floating < min_symbol_pnl:
         return {
@@ -86,7 +120,7 @@ def risk_guard(
     # ---- equity floor / daily loss ----
     equity_floor = _env_float("EQUITY_FLOOR", 0.0)
     daily_loss_limit = _env_float("DAILY_LOSS_LIMIT", 0.0)
-    acct = get_account_info() or {}
+    acct = (get_account_info() if account is None else account) or {}
     equity = float(acct.get("equity", 0))
     balance = float(acct.get("balance", 0))
 
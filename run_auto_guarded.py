@@ -11,9 +11,9 @@ from dotenv import load_dotenv
 # ensure .env is loaded
 load_dotenv()
 
-from app.agents.auto_decider import decide_signal
+from app.agents.auto_decider import decide_signals
 from app.exec.executor import place_order
-from app.risk.guards import risk_guard
+from app.risk.guards import broker_snapshot, risk_guard
 
 # optional: if you have an is_open endpoint/helper use it; otherwise we rely on guards
 try:
@@ -28,15 +28,31 @@ logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(),
 def _split_symbols(raw: str | None) -> List[str]:
     if not raw:
         return []
-    return [s.strip() for s in raw.split(",") if s.strip()]
+    # one strip per element
+    return [s for s in (t.strip() for t in raw.split(",")) if s]
 
 def _env_bool(name: str, default: bool) -> bool:
     raw = (os.getenv(name) or ("1" if default else "0")).strip().lower()
     return raw in {"1", "true", "yes", "on"}
 
+# symbol -> (expires_at monotonic, is_symbol_trading_now result)
+_market_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+
+def _market_cached(symbol: str, ttl: float) -> dict[str, Any]:
+    now = time.monotonic()
+    hit = _market_cache.get(symbol)
+    if hit and hit[0] > now:
+        return hit[1]
+    m = is_symbol_trading_now(symbol)
+    _market_cache[symbol] = (now + ttl, m)
+    return m
+
 def main() -> None:
     timeframe = os.getenv("AGENT_TIMEFRAME", "M15")
     period_sec = int(os.getenv("AGENT_PERIOD_SEC", "60"))
+    # the market check is informational (logged only); half a tick keeps it at most
+    # one cycle stale around session open/close
+    market_ttl = float(os.getenv("AGENT_MARKET_CHECK_TTL_SEC", str(period_sec / 2)))
 
     logging.info(f"[auto] starting loop. TF={timeframe} Period={period_sec}s")
 
@@ -52,19 +68,31 @@ def main() -> None:
             time.sleep(period_sec)
             continue
 
+        # one batched decision pass per tick (symbols of the same asset class share a
+        # vectorized indicator pass); per-symbol failures come back as error dicts
+        # only the streaming switch is forwarded: MOMENTUM_STREAMING=true advances
+        # per-(symbol, tf) EMA/RSI state by the newly closed bars instead of a full pass
+        env = {"MOMENTUM_STREAMING": os.getenv("MOMENTUM_STREAMING", "false")}
+        try:
+            sigs = decide_signals(symbols, timeframe, agent="auto", env=env)
+        except Exception as exc:
+            logging.exception(f"[auto] decide_signals crashed: {exc}")
+            time.sleep(period_sec)
+            continue
+
+        # broker snapshot shared by every risk_guard call this tick; fetched on the
+        # first symbol with a signal and dropped after a fill so the caps see it
+        positions = account = None
+
         for sym in symbols:
             # loud market check
             try:
-                m = is_symbol_trading_now(sym)
+                m = _market_cached(sym, market_ttl)
                 logging.info(f"[auto][market] {sym} tradable={m.get('tradable')} open={m.get('market_open')} note={m.get('note')}")
             except Exception as exc:
                 logging.info(f"[auto][market] {sym} market-check error: {exc}")
 
-            try:
-                sig = decide_signal(sym, timeframe, agent="auto") or {}
-            except Exception as exc:
-                logging.exception(f"[auto] decide_signal crashed for {sym}: {exc}")
-                continue
+            sig = sigs.get(sym) or {}
 
             side = (sig.get("side") or "").upper()
             why = sig.get("why")
@@ -81,7 +109,9 @@ def main() -> None:
                 continue
 
             # Risk guard (will also log cooldown/blocks)
-            g = risk_guard(sym, side, sig.get("sl_pips"))
+            if positions is None:
+                positions, account = broker_snapshot()
+            g = risk_guard(sym, side, sig.get("sl_pips"), positions=positions, account=account)
             if not g.get("accepted"):
                 logging.info(f"[auto] {sym} blocked -> {g}")
                 continue
@@ -90,6 +120,7 @@ def main() -> None:
             res = place_order(sym, sig)
             if res.get("status") == "ok":
                 logging.info(f"[auto] {sym} placed -> {res}")
+                positions = account = None
             else:
                 logging.info(f"[auto] {sym} place error -> {res}")
 
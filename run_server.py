@@ -13,11 +13,14 @@ def main():
     reload = os.environ.get("RELOAD", "true").lower() == "true"
     log_level = os.environ.get("LOG_LEVEL", "info")
 
+    # main() runs once in the reloader's supervisor; reloads only re-import app.main,
+    # so watch just the app package instead of scanning logs/ and the repo root
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=port,
         reload=reload,
+        reload_dirs=["app"] if reload else None,
         log_level=log_level,
     )
 
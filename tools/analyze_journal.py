@@ -2,7 +2,17 @@
 import datetime as dt
 import json
 import os
-from collections import defaultdict
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # stdlib json also accepts bytes
+    _loads = json.loads
 
 JOURNAL_DIR = os.environ.get("JOURNAL_DIR", "app/journal")
 TODAY = dt.datetime.now().strftime("%Y-%m-%d")
@@ -14,15 +24,15 @@ def load_trades(date=TODAY, limit=None):
     if not os.path.exists(path):
         print(f"[warn] No journal for {date}: {path}")
         return trades
-    with open(path, encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                trades.append(json.loads(line))
-            except Exception:
-                pass
+    # one bulk read; malformed lines are skipped
+    for line in Path(path).read_bytes().split(b"\n"):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            trades.append(_loads(line))
+        except ValueError:
+            pass
     if limit:
         trades = trades[-limit:]
     return trades
@@ -30,51 +40,54 @@ def load_trades(date=TODAY, limit=None):
 
 def kpis(trades):
     # Expect entries to have: status ('ok'/'error'), symbol, side, price, sl, tp, profit (if you add later)
+    # Counter over an iterable tallies in C; profit aggregates are numpy reductions
     n = len(trades)
-    ok = sum(1 for t in trades if str(t.get("status")) == "ok")
-    err = n - ok
-    by_symbol = defaultdict(int)
+    by_symbol = Counter(t.get("symbol", "?") for t in trades)
+    ok = 0
+    profit_list = []
     for t in trades:
-        by_symbol[t.get("symbol", "?")] += 1
+        ok += str(t.get("status")) == "ok"
+        if "profit" in t:
+            profit_list.append(float(t.get("profit", 0)))
+    err = n - ok
 
     # Profit stats if available
-    profits = [float(t.get("profit", 0)) for t in trades if "profit" in t]
-    gross_win = sum(p for p in profits if p > 0)
-    gross_loss = -sum(p for p in profits if p < 0)
-    win_rate = (sum(1 for p in profits if p > 0) / len(profits) * 100) if profits else 0
+    profits = np.asarray(profit_list, dtype=np.float64)
+    wins = profits > 0
+    gross_win = float(profits[wins].sum())
+    gross_loss = float((-profits[profits < 0]).sum())
+    win_rate = float(wins.mean() * 100) if profits.size else 0
     profit_factor = (gross_win / gross_loss) if gross_loss > 0 else None
-    net = sum(profits) if profits else 0
 
-    # Drawdown on cumulative PnL if present
+    # Drawdown on cumulative PnL if present (the running peak starts at 0)
+    equity = profits.cumsum()
+    net = float(equity[-1]) if profits.size else 0
     dd = 0.0
-    if profits:
-        equity = 0
-        peak = 0
-        maxdd = 0
-        for p in profits:
-            equity += p
-            peak = max(peak, equity)
-            maxdd = min(maxdd, equity - peak)
-        dd = maxdd
+    if profits.size:
+        peak = np.maximum(np.maximum.accumulate(equity), 0.0)
+        dd = min(float((equity - peak).min()), 0.0)
 
     return {
         "trades": n,
         "ok": ok,
         "error": err,
         "by_symbol": dict(by_symbol),
-        "profit_samples": len(profits),
+        "profit_samples": int(profits.size),
         "net_pnl": net,
         "win_rate_pct": win_rate,
         "gross_win": gross_win,
         "gross_loss": gross_loss,
         "profit_factor": profit_factor,
         "max_drawdown": dd,
+        "equity": equity,  # cumulative PnL per profit sample, for the plot
     }
 
 
 def print_report(k):
     print("\n=== DAILY PERFORMANCE ===")
     for k_, v in k.items():
+        if k_ == "equity":  # the curve is plotted, not printed
+            continue
         print(f"{k_:>15}: {v}")
     print("=========================\n")
 
@@ -85,13 +98,10 @@ if __name__ == "__main__":
     print_report(ks)
     # Optional: equity curve plot if matplotlib is installed and profit field exists
     try:
-        profits = [float(t.get("profit", 0)) for t in trades if "profit" in t]
-        if profits:
-            import itertools
-
+        equity = ks.get("equity")
+        if equity is not None and len(equity):
             import matplotlib.pyplot as plt
 
-            equity = list(itertools.accumulate(profits))
             plt.figure()
             plt.plot(equity)
             plt.title(f"Equity Curve {TODAY}")